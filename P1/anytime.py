@@ -0,0 +1,107 @@
+# %% [markdown]
+# # A* anytime (ARA*)
+#
+# Empieza con la heurística inflada por weight, lo que da un camino rápido con
+# coste como mucho weight veces el óptimo, y va bajando el peso reutilizando
+# la búsqueda anterior (los nodos que mejoran estando cerrados pasan a INCONS
+# en vez de reabrirse) hasta llegar a 1 o agotar el tiempo.
+# Cada resultado lleva su cota: coste <= bound * óptimo.
+
+# %%
+
+import math
+import time
+from collections import namedtuple
+
+from engine import reconstruct_path
+from openset import HeapOpenSet
+
+AnytimeResult = namedtuple("AnytimeResult", ["path", "cost", "bound", "weight", "expanded"])
+
+# cada cuántas expansiones se mira el reloj
+CLOCK_EVERY = 256
+
+# %%
+
+def ara_star(grid, start, end, weight=2.5, decrement=0.5, heuristic=None, deadline=None):
+    """
+    Generador de AnytimeResult cada vez más buenos.
+    Parámetros:
+        weight: peso inicial de la heurística (>= 1)
+        decrement: cuánto baja el peso en cada iteración
+        heuristic: función (celda, end) -> estimación admisible; por defecto la euclidea
+        deadline: instante de time.perf_counter() en el que se deja de mejorar
+    Termina al publicar el resultado con peso 1 (óptimo), al agotar el tiempo
+    o si no hay camino.
+    """
+    if not (grid.is_walkable(start) and grid.is_walkable(end)):
+        return
+    if heuristic is None:
+        heuristic = grid.heuristic
+    h_cache = {}
+
+    def h(i):
+        value = h_cache.get(i)
+        if value is None:
+            value = h_cache[i] = heuristic(i, end)
+        return value
+
+    g_score = {start: 0.0}
+    parent = {}
+    closed = set()
+    incons = set()
+    open_set = HeapOpenSet()
+    open_set.push(start, weight * h(start))
+    expanded = 0
+
+    while True:
+        #improve_path: expandir mientras algo en OPEN pueda mejorar el objetivo
+        while open_set and g_score.get(end, math.inf) > open_set.peek()[1]:
+            current, _ = open_set.pop()
+            closed.add(current)
+            expanded += 1
+            if deadline is not None and expanded % CLOCK_EVERY == 0 and time.perf_counter() > deadline:
+                return
+            g_current = g_score[current]
+            for neighbor, cost in grid.neighbors(current):
+                temp_g_score = g_current + cost
+                if temp_g_score < g_score.get(neighbor, math.inf):
+                    g_score[neighbor] = temp_g_score
+                    parent[neighbor] = current
+                    if neighbor in closed:
+                        incons.add(neighbor)
+                    else:
+                        open_set.push(neighbor, temp_g_score + weight * h(neighbor))
+
+        cost = g_score.get(end, math.inf)
+        if cost == math.inf:
+            return
+        pending = list(open_set.priority) + list(incons)
+        lower = min((g_score[i] + h(i) for i in pending), default=cost)
+        bound = min(weight, cost / lower) if lower > 0 else weight
+        yield AnytimeResult(reconstruct_path(parent, end), cost, max(bound, 1.0), weight, expanded)
+        if weight <= 1.0 or (deadline is not None and time.perf_counter() > deadline):
+            return
+
+        #siguiente iteración: menos peso, OPEN = OPEN + INCONS, CLOSED vacío
+        weight = max(1.0, weight - decrement)
+        rebuilt = HeapOpenSet()
+        for i in pending:
+            rebuilt.push(i, g_score[i] + weight * h(i))
+        open_set = rebuilt
+        incons = set()
+        closed = set()
+
+def find_path_anytime(grid, start, end, budget, weight=2.5, decrement=0.5, heuristic=None, on_result=None):
+    """
+    Mejor camino encontrado en budget segundos. on_result recibe cada
+    resultado intermedio. Retorna el último AnytimeResult, o uno con
+    path None si no dio tiempo (o no hay camino).
+    """
+    deadline = time.perf_counter() + budget
+    best = AnytimeResult(None, math.inf, math.inf, weight, 0)
+    for result in ara_star(grid, start, end, weight, decrement, heuristic, deadline):
+        best = result
+        if on_result is not None:
+            on_result(result)
+    return best
@@ -8,9 +8,14 @@ import sys
 
 import pygame
 import math
-import heapq
 import random
 
+from anytime import find_path_anytime
+from engine import Grid, find_path
+from gridfile import load_grid, save_grid
+from incremental import DStarLite
+from tour import plan_tour
+
 #colores
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -25,6 +30,11 @@ ROWS, COLS = 20, 20
 WIDTH, HEIGHT = 600, 600
 CELL_SIZE = WIDTH // COLS
 
+MAP_FILE = "mapa.agrid"  #S guarda y L carga el mapa del editor
+
+MAX_FPS = 60
+STEPS_PER_FRAME = 1  #expansiones de la búsqueda entre dos repintados
+
 DIAGONAL_DISTANCE = math.sqrt(WIDTH**2 + HEIGHT**2)
 MAX_RISK = 0.1 * DIAGONAL_DISTANCE
 
@@ -40,9 +50,7 @@ class Node:
         self.x = col * CELL_SIZE
         self.y = row * CELL_SIZE
         self.color = WHITE
-        self.neighbors = []
         self.risk = 0  
-        self.parent = None
 
     def is_start(self):
         return self.color == GREEN
@@ -89,72 +97,67 @@ class Node:
                                              (self.x + 5, self.y + CELL_SIZE - 5), 
                                              (self.x + CELL_SIZE - 5, self.y + CELL_SIZE - 5)], 2)
 
-    def update_neighbors(self, grid):
-        self.neighbors = []
-        directions = [
-            (0, 1), (0, -1), (1, 0), (-1, 0),  #ortogonales
-            (1, 1), (-1, -1), (1, -1), (-1, 1)  #diagonales
-        ]
-        for dr, dc in directions:
-            r, c = self.row + dr, self.col + dc
-            if 0 <= r < ROWS and 0 <= c < COLS and not grid[r][c].is_barrier():
-                self.neighbors.append(grid[r][c])
-
 
 # %% [markdown]
 # # Aux Functions
 
 # %%
-def h(p1, p2):
-    x1, y1 = p1
-    x2, y2 = p2
-    return math.sqrt((x1 - x2) ** 2 + (y1 - y2) ** 2)
-
-def reconstruct_path(current, draw):
-    while current.parent:
-        current = current.parent
-        current.color = (0, 255, 255)  #color ruta
+def to_engine_grid(grid):
+    #la interfaz es solo un cliente del motor: se vuelca el estado de los nodos
+    engine_grid = Grid(ROWS, COLS)
+    for row in grid:
+        for node in row:
+            if node.is_barrier():
+                engine_grid.set_barrier(node.row, node.col)
+            elif node.risk:
+                engine_grid.set_risk(node.row, node.col, node.risk)
+    return engine_grid
+
+def from_engine_grid(loaded):
+    #inverso de to_engine_grid: nodos de la interfaz a partir de un GridFile
+    engine_grid = loaded.grid
+    if (engine_grid.rows, engine_grid.cols) != (ROWS, COLS):
+        raise ValueError(f"El mapa es de {engine_grid.rows}x{engine_grid.cols}, el editor de {ROWS}x{COLS}")
+    grid = make_grid()
+    for i in map(int, (~engine_grid.walkable).nonzero()[0]):
+        grid[i // COLS][i % COLS].make_barrier()
+    for i in map(int, engine_grid.risk.nonzero()[0]):
+        node = grid[i // COLS][i % COLS]
+        node.make_risky()
+        node.risk = float(engine_grid.risk[i])
+    node_at = lambda i: None if i is None else grid[i // COLS][i % COLS]
+    start, end = node_at(loaded.start), node_at(loaded.end)
+    waypoints = [node_at(i) for i in loaded.waypoints]
+    for node in waypoints:
+        node.make_waypoint()
+    if start:
+        start.make_start()
+    if end:
+        end.make_end()
+    return grid, start, end, waypoints
+
+def reconstruct_path(path, grid, draw):
+    for i in path[:-1]:
+        row, col = divmod(i, COLS)
+        grid[row][col].color = (0, 255, 255)  #color ruta
         draw()
 
-def a_star(draw, grid, start, end):
-    count = 0
-    open_set = []
-    heapq.heappush(open_set, (0, count, start))
-    came_from = {}
-
-    g_score = {node: float("inf") for row in grid for node in row}
-    g_score[start] = 0
-    f_score = {node: float("inf") for row in grid for node in row}
-    f_score[start] = h((start.row, start.col), (end.row, end.col))
-
-    open_set_hash = {start}
-
-    while open_set:
-        current = heapq.heappop(open_set)[2]
-        open_set_hash.remove(current)
-
-        if current == end:
-            reconstruct_path(current, draw)
-            end.make_end()
-            return True
-
-        for neighbor in current.neighbors:
-            move_cost = math.sqrt((neighbor.row - current.row) ** 2 + (neighbor.col - current.col) ** 2)  #1 para ortogonal, sqrt(2) para diagonal
-            temp_g_score = g_score[current] + move_cost + neighbor.risk  #penal
-
-            if temp_g_score < g_score[neighbor]:
-                came_from[neighbor] = current
-                g_score[neighbor] = temp_g_score
-                f_score[neighbor] = temp_g_score + h((neighbor.row, neighbor.col), (end.row, end.col))
-                neighbor.parent = current
-
-                if neighbor not in open_set_hash:
-                    count += 1
-                    heapq.heappush(open_set, (f_score[neighbor], count, neighbor))
-                    open_set_hash.add(neighbor)
-
-        draw()
-    return False
+def a_star(draw, grid, start, end, engine_grid=None, budget=None, stats=None):
+    #con budget (segundos) se usa ARA* y se pinta el mejor camino a tiempo;
+    #stats (profiling.SearchStats) solo se rellena con A* normal
+    if engine_grid is None:
+        engine_grid = to_engine_grid(grid)
+    start_index = engine_grid.index(start.row, start.col)
+    end_index = engine_grid.index(end.row, end.col)
+    if budget is None:
+        result = find_path(engine_grid, start_index, end_index, on_expand=lambda i: draw(), stats=stats)
+    else:
+        result = find_path_anytime(engine_grid, start_index, end_index, budget)
+    if result.path is None:
+        return False
+    reconstruct_path(result.path, grid, draw)
+    end.make_end()
+    return True
 
 def make_grid():
     return [[Node(i, j) for j in range(COLS)] for i in range(ROWS)]
@@ -165,17 +168,88 @@ def draw_grid(win):
         for j in range(COLS):
             pygame.draw.line(win, GREY, (j * CELL_SIZE, 0), (j * CELL_SIZE, HEIGHT))
 
-def draw(win, grid, state):
-
-    win.fill(WHITE)
-    for row in grid:
-        for node in row:
-            node.draw(win)
-    draw_grid(win)
-    font = pygame.font.SysFont(None, 36)
-    text = font.render(f"Mode: {state.capitalize()}, R = Risk, W = Waypoint, C = Clear", True, BLACK)
-    win.blit(text, (10, 10))
-    pygame.display.update()
+_fonts = {}
+
+def get_font(size=36):
+    #crear una SysFont es caro: se crea una vez por tamaño
+    if size not in _fonts:
+        _fonts[size] = pygame.font.SysFont(None, size)
+    return _fonts[size]
+
+def header_text(state):
+    return f"Mode: {state.capitalize()}, R = Risk, W = Waypoint, O = Order, C = Clear, S/L = Save/Load"
+
+class Renderer:
+    """
+    Repintado por celdas sucias: solo se vuelven a dibujar las celdas cuyo
+    color ha cambiado desde el último frame, con las líneas de la rejilla
+    sacadas de una superficie estática y la fuente cacheada.
+    step() es el callback para las búsquedas: pinta cada steps_per_frame
+    expansiones y nunca más de max_fps veces por segundo, sin esperar, así que
+    no frena la búsqueda.
+    """
+
+    KEY = (1, 2, 3)  #color transparente de la superficie de líneas
+
+    def __init__(self, win, max_fps=MAX_FPS, steps_per_frame=STEPS_PER_FRAME):
+        self.win = win
+        self.max_fps = max_fps
+        self.steps_per_frame = steps_per_frame
+        self.clock = pygame.time.Clock()
+        self.lines = pygame.Surface((WIDTH, HEIGHT))
+        self.lines.fill(self.KEY)
+        self.lines.set_colorkey(self.KEY)
+        draw_grid(self.lines)
+        self.grid = None
+        self.colors = {}
+        self.text = None
+        self.text_surface = None
+        self.steps = 0
+        self.last_frame = 0
+
+    def draw(self, grid, state):
+        full = grid is not self.grid
+        self.grid = grid
+        text = header_text(state)
+        if text != self.text:
+            #el texto anterior puede tapar más celdas: se repinta todo
+            self.text = text
+            self.text_surface = get_font().render(text, True, BLACK)
+            full = True
+        dirty = []
+        for row in grid:
+            for node in row:
+                key = (node.row, node.col)
+                if full or self.colors.get(key) != node.color:
+                    self.colors[key] = node.color
+                    node.draw(self.win)
+                    if not full:
+                        rect = pygame.Rect(node.x, node.y, CELL_SIZE, CELL_SIZE)
+                        self.win.blit(self.lines, rect, area=rect)
+                        dirty.append(rect)
+        if full:
+            self.win.blit(self.lines, (0, 0))
+        text_rect = self.text_surface.get_rect(topleft=(10, 10))
+        if full or text_rect.collidelist(dirty) != -1:
+            self.win.blit(self.text_surface, text_rect)
+            dirty.append(text_rect)
+        if full:
+            pygame.display.update()
+        elif dirty:
+            pygame.display.update(dirty)
+        self.last_frame = pygame.time.get_ticks()
+
+    def step(self, grid, state):
+        self.steps += 1
+        if self.steps % self.steps_per_frame:
+            return
+        if pygame.time.get_ticks() - self.last_frame < 1000 / self.max_fps:
+            return
+        pygame.event.pump()  #la ventana sigue respondiendo durante la búsqueda
+        self.draw(grid, state)
+
+    def tick(self):
+        self.clock.tick(self.max_fps)
 
 def get_clicked_pos(pos):
     x, y = pos
@@ -183,34 +257,78 @@ def get_clicked_pos(pos):
     col = x // CELL_SIZE
     return row, col
 
-def find_path_with_waypoints(draw, grid, start, waypoints, end):
+def find_path_with_waypoints(draw, grid, start, waypoints, end, budget=None):
+    #budget es el tiempo total: se reparte a partes iguales entre los tramos
+    engine_grid = to_engine_grid(grid)
     all_points = [start] + waypoints + [end]
+    leg_budget = budget / (len(all_points) - 1) if budget is not None else None
     for i in range(len(all_points) - 1):
-        a_star(draw, grid, all_points[i], all_points[i + 1])
-        for row in grid:  
-            for node in row:
-                node.parent = None
+        a_star(draw, grid, all_points[i], all_points[i + 1], engine_grid, leg_budget)
+
+def optimize_waypoints(engine_grid, start, waypoints, end):
+    #orden de visita de menor coste; en una rejilla de 20x20 no compensa el pool
+    index = lambda node: engine_grid.index(node.row, node.col)
+    tour = plan_tour(engine_grid, index(start), [index(w) for w in waypoints], index(end), processes=1)
+    if tour.path is None:  #algún waypoint es inalcanzable: se deja el orden actual
+        return list(waypoints)
+    return [waypoints[i] for i in tour.order]
+
+def sync_engine_grid(grid, engine_grid, dirty):
+    #vuelca solo las celdas editadas y devuelve sus índices
+    changed = []
+    for row, col in dirty:
+        node = grid[row][col]
+        if node.is_barrier():
+            engine_grid.set_barrier(row, col)
+        else:
+            engine_grid.set_risk(row, col, node.risk)
+        changed.append(engine_grid.index(row, col))
+    dirty.clear()
+    return changed
+
+def replan_with_waypoints(draw, grid, engine_grid, planners, changed, start, waypoints, end):
+    #un D* Lite por tramo; los que ya existen solo reparan lo que ha cambiado
+    all_points = [start] + waypoints + [end]
+    legs = [(engine_grid.index(a.row, a.col), engine_grid.index(b.row, b.col))
+            for a, b in zip(all_points, all_points[1:])]
+    for leg in list(planners):
+        if leg not in legs:
+            del planners[leg]
+    for leg, point in zip(legs, all_points[1:]):
+        planner = planners.get(leg)
+        if planner is None:
+            planner = planners[leg] = DStarLite(engine_grid, *leg)
+        else:
+            planner.update_cells(changed)
+        result = planner.compute_path(on_expand=lambda i: draw())
+        if result.path is not None:
+            reconstruct_path(result.path, grid, draw)
+            point.make_end()
 
 # %% [markdown]
 # # Main
 
 # %%
-pygame.init()
-WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Algoritmo A*")
-
-
 
 def main():
+    pygame.init()
+    WIN = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Algoritmo A*")
+
+    renderer = Renderer(WIN)
     grid = make_grid()
     start = None
     end = None
     waypoints = []
     running = True
     state = "start"
+    engine_grid = None
+    planners = {}
+    dirty = set()  #celdas editadas desde la última búsqueda
 
     while running:
-        draw(WIN, grid, state)
+        renderer.draw(grid, state)
+        renderer.tick()
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -219,6 +337,7 @@ def main():
             if pygame.mouse.get_pressed()[0]:  #click izquierdo
                 row, col = get_clicked_pos(pygame.mouse.get_pos())
                 node = grid[row][col]
+                dirty.add((row, col))
                 if not start:
                     start = node
                     start.make_start()
@@ -235,6 +354,7 @@ def main():
                 row, col = get_clicked_pos(pygame.mouse.get_pos())
                 node = grid[row][col]
                 node.reset()
+                dirty.add((row, col))
                 if node == start:
                     start = None
                     state = "start"
@@ -247,31 +367,67 @@ def main():
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE and start and end:
-                    for row in grid:
-                        for node in row:
-                            node.update_neighbors(grid)
-                    find_path_with_waypoints(lambda: draw(WIN, grid, state), grid, start, waypoints, end)
+                    if engine_grid is None:
+                        engine_grid = to_engine_grid(grid)
+                        dirty.clear()
+                    changed = sync_engine_grid(grid, engine_grid, dirty)
+                    replan_with_waypoints(lambda: renderer.step(grid, state), grid, engine_grid,
+                                          planners, changed, start, waypoints, end)
+
+                if event.key == pygame.K_o and start and end and waypoints:  #optimizar orden
+                    if engine_grid is None:
+                        engine_grid = to_engine_grid(grid)
+                        dirty.clear()
+                    changed = sync_engine_grid(grid, engine_grid, dirty)
+                    for planner in planners.values():
+                        planner.update_cells(changed)
+                    waypoints = optimize_waypoints(engine_grid, start, waypoints, end)
+
+                if event.key in (pygame.K_PLUS, pygame.K_KP_PLUS, pygame.K_EQUALS):  #más pasos por frame
+                    renderer.steps_per_frame *= 2
+
+                if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):  #menos pasos por frame
+                    renderer.steps_per_frame = max(1, renderer.steps_per_frame // 2)
 
                 if event.key == pygame.K_w:  #waypoint
                     row, col = get_clicked_pos(pygame.mouse.get_pos())
                     if grid[row][col] != start and grid[row][col] != end:
                         grid[row][col].make_waypoint()
                         waypoints.append(grid[row][col])
+                        dirty.add((row, col))
 
                 if event.key == pygame.K_r:  #celda con riesgo
                     row, col = get_clicked_pos(pygame.mouse.get_pos())
                     if grid[row][col] != start and grid[row][col] != end:
                         grid[row][col].make_risky()
+                        dirty.add((row, col))
+
+                if event.key == pygame.K_s:  #guardar mapa
+                    index_of = lambda node: None if node is None else node.row * COLS + node.col
+                    save_grid(MAP_FILE, to_engine_grid(grid), index_of(start), index_of(end),
+                              [index_of(node) for node in waypoints])
+
+                if event.key == pygame.K_l:  #cargar mapa
+                    try:
+                        grid, start, end, waypoints = from_engine_grid(load_grid(MAP_FILE, mmap=False))
+                    except (OSError, ValueError) as e:
+                        print(e, file=sys.stderr)
+                    else:
+                        state = "start" if not start else "target" if not end else "barrier"
+                        engine_grid = None
+                        planners = {}
+                        dirty = set()
 
                 if event.key == pygame.K_c:  #borrar todo
                     grid = make_grid()
                     start, end = None, None
                     waypoints = []
                     state = "start"
+                    engine_grid = None
+                    planners = {}
+                    dirty = set()
 
     pygame.quit()
 
-main()
-
-
-
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# %% [markdown]
+# # Consultas por lotes
+#
+# Miles de consultas (start, end) sobre el mismo mapa: los fallos de caché se
+# reparten en un pool de procesos que leen una única copia de la rejilla en
+# memoria compartida, y los resultados se guardan en una caché LRU que se
+# vacía cuando cambia grid.version (cualquier barrera, riesgo o borrado).
+
+# %%
+
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import find_path
+from shared import SharedGrid, init_worker, worker_grid
+
+# %%
+
+class PathCache:
+    """Caché LRU de SearchResult por (start, end) ligada a una versión del Grid."""
+
+    def __init__(self, grid, max_size=4096):
+        self.grid = grid
+        self.max_size = max_size
+        self.version = grid.version
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self):
+        if self.version != self.grid.version:
+            self.entries.clear()
+            self.version = self.grid.version
+
+    def get(self, key):
+        self._check_version()
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        self._check_version()
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+def _worker_find_path(query):
+    return find_path(worker_grid(), *query)
+
+class BatchPlanner:
+    """
+    Uso:
+        with BatchPlanner(grid, processes=4) as planner:
+            results = planner.query_many([(a, b), (c, d), ...])
+    El pool y la copia compartida se crean al primer lote y se rehacen si la
+    versión del Grid ha cambiado desde entonces. processes=1 no usa pool.
+    """
+
+    def __init__(self, grid, processes=None, cache_size=4096):
+        self.grid = grid
+        self.processes = processes
+        self.cache = PathCache(grid, cache_size)
+        self._pool = None
+        self._shared = None
+        self._pool_version = None
+
+    def _get_pool(self):
+        if self._pool is not None and self._pool_version != self.grid.version:
+            self.close()
+        if self._pool is None:
+            self._shared = SharedGrid(self.grid)
+            self._pool = ProcessPoolExecutor(self.processes, initializer=init_worker,
+                                             initargs=(self._shared.handle,))
+            self._pool_version = self.grid.version
+        return self._pool
+
+    def query(self, start, end):
+        result = self.cache.get((start, end))
+        if result is None:
+            result = find_path(self.grid, start, end)
+            self.cache.put((start, end), result)
+        return result
+
+    def query_many(self, queries, chunksize=None):
+        """Lista de SearchResult en el mismo orden que queries."""
+        results = [self.cache.get(tuple(q)) for q in queries]
+        missing = list(dict.fromkeys(tuple(q) for q, r in zip(queries, results) if r is None))
+        if missing:
+            if self.processes == 1 or len(missing) == 1:
+                solved = [find_path(self.grid, *q) for q in missing]
+            else:
+                pool = self._get_pool()
+                if chunksize is None:
+                    chunksize = max(1, len(missing) // (4 * (self.processes or os.cpu_count() or 1)))
+                solved = list(pool.map(_worker_find_path, missing, chunksize=chunksize))
+            for q, result in zip(missing, solved):
+                self.cache.put(q, result)
+            solved = dict(zip(missing, solved))
+            results = [r if r is not None else solved[tuple(q)] for q, r in zip(queries, results)]
+        return results
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._shared.close()
+            self._pool = self._shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,417 @@
+# %% [markdown]
+# # Benchmarks del motor A*
+#
+# Uso:
+#   python P1/bench.py                      comparaciones de cada modo
+#   python P1/bench.py suite --out r.json   batería sobre mapas sintéticos
+#   python P1/bench.py movingai x.map x.scen --out r.csv
+#   python P1/bench.py profile maze --stats s.json --trace t.csv
+# suite y movingai aceptan --baseline con un resultado anterior para
+# señalar regresiones.
+
+# %%
+
+import argparse
+import csv
+import heapq
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from bidirectional import find_path_bidirectional
+from engine import DIRECTIONS, find_path
+from jps import find_path_jps, risk_zone
+from landmarks import Landmarks
+from maps import SYNTHETIC, load_movingai_map, load_movingai_scen, random_grid
+from openset import OPEN_SETS, make_open_set
+from profiling import SearchStats
+
+# %% [markdown]
+# # A* original
+#
+# Réplica de a_star tal y como estaba en astar.py (heapq + open_set_hash, sin
+# volver a insertar un nodo abierto cuando mejora su g), para comparar.
+
+# %%
+
+def legacy_a_star(grid, start, end):
+    rows, cols = grid.rows, grid.cols
+    walk, risk = grid._walk, grid._risk
+    er, ec = divmod(end, cols)
+    count = 0
+    open_set = [(0, count, start)]
+    g_score = {start: 0.0}
+    parent = {}
+    open_set_hash = {start}
+    expanded = 0
+    while open_set:
+        current = heapq.heappop(open_set)[2]
+        open_set_hash.remove(current)
+        if current == end:
+            path = [end]
+            while path[-1] in parent:
+                path.append(parent[path[-1]])
+            return path[::-1], g_score[end], expanded
+        expanded += 1
+        r, c = divmod(current, cols)
+        for dr, dc, step in DIRECTIONS:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols and walk[nr * cols + nc]:
+                neighbor = nr * cols + nc
+                temp_g_score = g_score[current] + step + risk[neighbor]
+                if temp_g_score < g_score.get(neighbor, math.inf):
+                    g_score[neighbor] = temp_g_score
+                    parent[neighbor] = current
+                    if neighbor not in open_set_hash:
+                        count += 1
+                        f = temp_g_score + math.sqrt((nr - er) ** 2 + (nc - ec) ** 2)
+                        heapq.heappush(open_set, (f, count, neighbor))
+                        open_set_hash.add(neighbor)
+    return None, math.inf, expanded
+
+# %% [markdown]
+# # Comparación de open sets
+
+# %%
+
+def compare_open_sets(sizes=(100, 250, 500), seeds=(0, 1, 2), obstacle_density=0.2, risk_density=0.3):
+    """
+    Compara expansiones, coste y tiempo de pared del a_star original y de cada
+    open set de openset.py sobre rejillas grandes con muchas celdas de riesgo.
+    """
+    rows = []
+    for size in sizes:
+        for seed in seeds:
+            grid = random_grid(size, size, obstacle_density, risk_density, seed=seed)
+            start, end = 0, grid.size - 1
+            t0 = time.perf_counter()
+            _, cost, expanded = legacy_a_star(grid, start, end)
+            rows.append((size, seed, "legacy", expanded, cost, time.perf_counter() - t0))
+            for kind in OPEN_SETS:
+                t0 = time.perf_counter()
+                result = find_path(grid, start, end, open_set=kind)
+                rows.append((size, seed, kind, result.expanded, result.cost, time.perf_counter() - t0))
+    return rows
+
+# %% [markdown]
+# # JPS frente a A*
+
+# %%
+
+def compare_jps(size=1000, densities=(0.02, 0.05, 0.1), risk_density=0.001, seed=1):
+    """
+    Expansiones y tiempo de find_path y find_path_jps en mapas abiertos con
+    pocos obstáculos. La máscara de riesgo se calcula aparte (es reutilizable).
+    """
+    rows = []
+    for density in densities:
+        grid = random_grid(size, size, density, risk_density, seed=seed)
+        start, end = 0, grid.size - 1
+        t0 = time.perf_counter()
+        result = find_path(grid, start, end)
+        rows.append((size, density, "astar", result.expanded, result.cost, time.perf_counter() - t0))
+        rough = risk_zone(grid)
+        t0 = time.perf_counter()
+        result = find_path_jps(grid, start, end, rough=rough)
+        rows.append((size, density, "jps", result.expanded, result.cost, time.perf_counter() - t0))
+    return rows
+
+# %% [markdown]
+# # Heurística de landmarks frente a h()
+
+# %%
+
+def compare_heuristics(size=200, risk_density=0.3, max_risk=20.0, landmarks=8, queries=50, seed=0):
+    """
+    Expansiones y tiempo medios por consulta con la euclidea y con ALT sobre
+    las mismas parejas aleatorias. El coste de construir las tablas se da aparte.
+    """
+    grid = random_grid(size, size, 0.15, risk_density, max_risk, seed=seed)
+    t0 = time.perf_counter()
+    alt = Landmarks(grid, landmarks, seed=seed)
+    build = time.perf_counter() - t0
+    rng = random.Random(seed)
+    free = np.flatnonzero(grid.walkable)
+    pairs = [(int(rng.choice(free)), int(rng.choice(free))) for _ in range(queries)]
+    rows = [(size, "alt build", "-", build)]
+    for name in ("euclidean", "alt"):
+        expanded, t0 = 0, time.perf_counter()
+        for start, end in pairs:
+            heuristic = alt.heuristic(end) if name == "alt" else None
+            expanded += find_path(grid, start, end, heuristic=heuristic).expanded
+        rows.append((size, name, expanded // queries, (time.perf_counter() - t0) / queries))
+    return rows
+
+# %% [markdown]
+# # A* bidireccional frente a A*
+
+# %%
+
+class CountingOpenSet:
+    """Envuelve un open set y cuenta operaciones y tamaño máximo."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.pushes = 0
+        self.pops = 0
+        self.peak = 0
+
+    def __len__(self):
+        return len(self.inner)
+
+    def __contains__(self, item):
+        return item in self.inner
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def push(self, item, priority):
+        pushed = self.inner.push(item, priority)
+        if pushed:
+            self.pushes += 1
+            if len(self.inner) > self.peak:
+                self.peak = len(self.inner)
+        return pushed
+
+    def pop(self):
+        self.pops += 1
+        return self.inner.pop()
+
+class OpenSetTracker:
+    """Fábrica para el parámetro open_set que guarda los open sets creados."""
+
+    def __init__(self, kind=None):
+        self.kind = kind
+        self.created = []
+
+    def __call__(self):
+        open_set = CountingOpenSet(make_open_set(self.kind))
+        self.created.append(open_set)
+        return open_set
+
+    def peak(self):
+        #con dos búsquedas se suman los máximos de ambas (cota superior)
+        return sum(open_set.peak for open_set in self.created)
+
+    def operations(self):
+        return sum(open_set.pushes + open_set.pops for open_set in self.created)
+
+def compare_bidirectional(sizes=(250, 500), obstacle_density=0.2, risk_density=0.1, seed=1):
+    """
+    Pico del open set, expansiones y tiempo de A* y A* bidireccional entre
+    esquinas opuestas.
+    """
+    rows = []
+    for size in sizes:
+        grid = random_grid(size, size, obstacle_density, risk_density, seed=seed)
+        start, end = 0, grid.size - 1
+        for name, search in (("astar", find_path), ("bidir", find_path_bidirectional)):
+            tracker = OpenSetTracker()
+            t0 = time.perf_counter()
+            result = search(grid, start, end, open_set=tracker)
+            rows.append((size, name, tracker.peak(), result.expanded, result.cost, time.perf_counter() - t0))
+    return rows
+
+def print_table(rows, header):
+    print("  ".join(f"{h:>10}" for h in header))
+    for row in rows:
+        print("  ".join(f"{v:>10.4f}" if isinstance(v, float) else f"{v!s:>10}" for v in row))
+
+# %% [markdown]
+# # Batería de benchmarks
+
+# %%
+
+ALGORITHMS = {
+    "astar": find_path,
+    "jps": find_path_jps,
+    "bidir": find_path_bidirectional,
+}
+
+def run_query(grid, algorithm, start, end):
+    """
+    Una consulta medida dos veces: una sin instrumentar para el tiempo de
+    pared y otra con tracemalloc y contadores en el open set.
+    """
+    search = ALGORITHMS[algorithm]
+    t0 = time.perf_counter()
+    result = search(grid, start, end)
+    seconds = time.perf_counter() - t0
+    tracker = OpenSetTracker()
+    tracemalloc.start()
+    search(grid, start, end, open_set=tracker)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "algorithm": algorithm,
+        "start": start,
+        "end": end,
+        "cost": result.cost if result.path is not None else None,
+        "expanded": result.expanded,
+        "heap_ops": tracker.operations(),
+        "peak_open": tracker.peak(),
+        "peak_memory": peak_memory,
+        "seconds": seconds,
+    }
+
+def random_queries(grid, count, seed=0):
+    #la primera consulta es siempre de esquina a esquina
+    rng = random.Random(seed)
+    free = np.flatnonzero(grid.walkable)
+    queries = [(0, grid.size - 1)]
+    while len(queries) < count:
+        queries.append((int(rng.choice(free)), int(rng.choice(free))))
+    return queries
+
+def run_suite(kinds=tuple(SYNTHETIC), sizes=(64, 128, 256), algorithms=tuple(ALGORITHMS), queries=5, seed=0):
+    """Genera un registro (dict) por mapa, tamaño, algoritmo y consulta."""
+    for kind in kinds:
+        for size in sizes:
+            grid = SYNTHETIC[kind](size, seed)
+            for q, (start, end) in enumerate(random_queries(grid, queries, seed)):
+                for algorithm in algorithms:
+                    record = {"map": kind, "rows": grid.rows, "cols": grid.cols, "query": q}
+                    record.update(run_query(grid, algorithm, start, end))
+                    yield record
+
+def run_movingai(map_path, scen_path, algorithms=tuple(ALGORITHMS), limit=None):
+    grid = load_movingai_map(map_path)
+    scenarios = load_movingai_scen(scen_path, grid)[:limit]
+    for q, scenario in enumerate(scenarios):
+        for algorithm in algorithms:
+            record = {"map": scenario.map, "rows": grid.rows, "cols": grid.cols, "query": q,
+                      "bucket": scenario.bucket, "optimal": scenario.optimal}
+            record.update(run_query(grid, algorithm, scenario.start, scenario.end))
+            yield record
+
+def write_results(records, path, fmt=None):
+    #formato por extensión: .csv o JSON (lista de objetos)
+    fmt = fmt or ("csv" if path.endswith(".csv") else "json")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            fields = list(dict.fromkeys(k for record in records for k in record))
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(records)
+        else:
+            json.dump(records, f, indent=1)
+
+def read_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        if not path.endswith(".csv"):
+            return json.load(f)
+        records = list(csv.DictReader(f))
+    for record in records:
+        for key in ("expanded", "heap_ops", "seconds"):
+            record[key] = float(record[key])
+    return records
+
+def find_regressions(baseline, records, tolerance=0.1):
+    """
+    Registros que empeoran respecto a baseline (mismo mapa, tamaño,
+    algoritmo y consulta): más expansiones, o más de tolerance en tiempo.
+    """
+    key = lambda r: (r["map"], int(r["rows"]), int(r["cols"]), r["algorithm"], int(r["query"]))
+    previous = {key(r): r for r in baseline}
+    regressions = []
+    for record in records:
+        old = previous.get(key(record))
+        if old is None:
+            continue
+        if record["expanded"] > old["expanded"] or record["seconds"] > old["seconds"] * (1 + tolerance):
+            regressions.append((old, record))
+    return regressions
+
+def profile(source, scen=None, size=256, queries=5, seed=0, open_set=None, trace=False):
+    """
+    SearchStats acumulado de A* sobre un mapa sintético (nombre de SYNTHETIC)
+    o un fichero .map; las consultas salen de scen o son aleatorias.
+    """
+    if source in SYNTHETIC:
+        grid = SYNTHETIC[source](size, seed)
+    else:
+        grid = load_movingai_map(source)
+    if scen is not None:
+        pairs = [(s.start, s.end) for s in load_movingai_scen(scen, grid)[:queries]]
+    else:
+        pairs = random_queries(grid, queries, seed)
+    stats = SearchStats(trace=trace)
+    for start, end in pairs:
+        find_path(grid, start, end, open_set=open_set, stats=stats)
+    return stats
+
+def print_comparisons():
+    print_table(compare_open_sets(), ("size", "seed", "open_set", "expanded", "cost", "seconds"))
+    print()
+    print_table(compare_jps(), ("size", "density", "mode", "expanded", "cost", "seconds"))
+    print()
+    print_table(compare_heuristics(), ("size", "heuristic", "expanded", "seconds"))
+    print()
+    print_table(compare_bidirectional(), ("size", "mode", "peak_open", "expanded", "cost", "seconds"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del motor A*")
+    sub = parser.add_subparsers(dest="command")
+    suite = sub.add_parser("suite", help="mapas sintéticos")
+    suite.add_argument("--maps", nargs="+", default=list(SYNTHETIC), choices=list(SYNTHETIC))
+    suite.add_argument("--sizes", nargs="+", type=int, default=[64, 128, 256])
+    suite.add_argument("--queries", type=int, default=5)
+    suite.add_argument("--seed", type=int, default=0)
+    movingai = sub.add_parser("movingai", help="mapa y escenarios de MovingAI")
+    movingai.add_argument("map")
+    movingai.add_argument("scen")
+    movingai.add_argument("--limit", type=int)
+    prof = sub.add_parser("profile", help="contadores y traza de A*")
+    prof.add_argument("map", help="nombre de mapa sintético o fichero .map")
+    prof.add_argument("scen", nargs="?")
+    prof.add_argument("--size", type=int, default=256)
+    prof.add_argument("--queries", type=int, default=5)
+    prof.add_argument("--seed", type=int, default=0)
+    prof.add_argument("--open-set", choices=list(OPEN_SETS))
+    prof.add_argument("--stats", help="fichero JSON con los contadores; si no, por stdout")
+    prof.add_argument("--trace", help="traza por expansión (.csv o .jsonl)")
+    for command in (suite, movingai):
+        command.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS), choices=list(ALGORITHMS))
+        command.add_argument("--out", help="fichero .json o .csv; si no, JSON por stdout")
+        command.add_argument("--baseline", help="resultados anteriores con los que comparar")
+        command.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        print_comparisons()
+        return 0
+    if args.command == "profile":
+        stats = profile(args.map, args.scen, args.size, args.queries, args.seed,
+                        args.open_set, trace=args.trace is not None)
+        if args.stats:
+            stats.to_json(args.stats)
+        else:
+            print(json.dumps(stats.as_dict(), indent=1))
+        if args.trace:
+            stats.write_trace(args.trace)
+        return 0
+    if args.command == "suite":
+        records = list(run_suite(args.maps, args.sizes, args.algorithms, args.queries, args.seed))
+    else:
+        records = list(run_movingai(args.map, args.scen, args.algorithms, args.limit))
+    if args.out:
+        write_results(records, args.out)
+    else:
+        json.dump(records, sys.stdout, indent=1)
+        print()
+    if args.baseline:
+        regressions = find_regressions(read_results(args.baseline), records, args.tolerance)
+        for old, new in regressions:
+            print(f"REGRESION {new['map']} {new['rows']}x{new['cols']} {new['algorithm']} q{new['query']}: "
+                  f"expanded {old['expanded']} -> {new['expanded']}, "
+                  f"seconds {float(old['seconds']):.4f} -> {new['seconds']:.4f}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
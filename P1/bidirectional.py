@@ -0,0 +1,82 @@
+# %% [markdown]
+# # A* bidireccional
+#
+# Una búsqueda hacia delante desde start y otra hacia atrás desde end. La de
+# atrás recorre las aristas al revés con grid.predecessors: el riesgo se cobra
+# al entrar en una celda, así que el coste de p -> u es el paso más el riesgo
+# de u, no el de p.
+# Se usan potenciales "promedio" (Ikeda et al.):
+#     pf(v) = (h(v, end) - h(start, v)) / 2,  pr(v) = -pf(v)
+# Con ellos las dos búsquedas ven los mismos costes reducidos, que no son
+# negativos, y es correcto parar en cuanto
+#     min clave hacia delante + min clave hacia atrás >= mu
+# siendo mu el mejor camino encontrado por el punto de encuentro.
+
+# %%
+
+import math
+
+from engine import SearchResult
+from openset import make_open_set
+
+# %%
+
+def find_path_bidirectional(grid, start, end, open_set=None):
+    """
+    Mismos parámetros y resultado que engine.find_path (sin on_expand);
+    expanded suma las expansiones de las dos direcciones.
+    """
+    if not (grid.is_walkable(start) and grid.is_walkable(end)):
+        return SearchResult(None, math.inf, 0)
+    if start == end:
+        return SearchResult([start], 0.0, 0)
+    cols = grid.cols
+    sr, sc = divmod(start, cols)
+    er, ec = divmod(end, cols)
+
+    def potential(i):
+        r, c = divmod(i, cols)
+        return (math.sqrt((r - er) ** 2 + (c - ec) ** 2) - math.sqrt((r - sr) ** 2 + (c - sc) ** 2)) / 2
+
+    #índice 0: hacia delante, 1: hacia atrás
+    dist = ({start: 0.0}, {end: 0.0})
+    parent = ({}, {})
+    closed = (set(), set())
+    edges = (grid.neighbors, grid.predecessors)
+    sign = (1, -1)
+    open_sets = (make_open_set(open_set), make_open_set(open_set))
+    open_sets[0].push(start, potential(start))
+    open_sets[1].push(end, -potential(end))
+    best, meet = math.inf, None
+    expanded = 0
+
+    while open_sets[0] and open_sets[1]:
+        if open_sets[0].peek()[1] + open_sets[1].peek()[1] >= best:
+            break
+        #se avanza por el lado con la frontera más pequeña
+        side = 0 if len(open_sets[0]) <= len(open_sets[1]) else 1
+        other = 1 - side
+        current, _ = open_sets[side].pop()
+        closed[side].add(current)
+        expanded += 1
+        d_current = dist[side][current]
+        for neighbor, cost in edges[side](current):
+            if neighbor in closed[side]:
+                continue
+            temp = d_current + cost
+            if temp < dist[side].get(neighbor, math.inf):
+                dist[side][neighbor] = temp
+                parent[side][neighbor] = current
+                open_sets[side].push(neighbor, temp + sign[side] * potential(neighbor))
+                if neighbor in dist[other] and temp + dist[other][neighbor] < best:
+                    best, meet = temp + dist[other][neighbor], neighbor
+
+    if meet is None:
+        return SearchResult(None, math.inf, expanded)
+    path = [meet]
+    while path[-1] in parent[0]:
+        path.append(parent[0][path[-1]])
+    path.reverse()
+    while path[-1] in parent[1]:
+        path.append(parent[1][path[-1]])
+    return SearchResult(path, best, expanded)
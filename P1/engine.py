@@ -0,0 +1,270 @@
+# %% [markdown]
+# # Motor A* sin interfaz
+#
+# Búsqueda sobre una rejilla compacta: la transitabilidad y el riesgo se guardan
+# en arrays de NumPy y las celdas se identifican por su índice entero
+# (fila * cols + columna). No depende de pygame, así que se puede importar desde
+# scripts o trabajos por lotes.
+
+# %%
+
+import heapq
+import math
+from array import array
+from collections import namedtuple
+
+import numpy as np
+
+from openset import make_open_set
+
+SQRT2 = math.sqrt(2)
+
+# (dr, dc, coste del movimiento) en el mismo orden que Node.update_neighbors
+DIRECTIONS = (
+    (0, 1, 1.0), (0, -1, 1.0), (1, 0, 1.0), (-1, 0, 1.0),  #ortogonales
+    (1, 1, SQRT2), (-1, -1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2),  #diagonales
+)
+
+SearchResult = namedtuple("SearchResult", ["path", "cost", "expanded"])
+
+# %% [markdown]
+# # Class Grid
+
+# %%
+
+class Grid:
+    """
+    Rejilla de rows x cols celdas.
+    walkable: array bool (1 byte por celda), False = barrera.
+    risk: array float32 con la penalización que se paga al entrar en la celda.
+    version: contador que suben set_barrier, set_risk y clear; quien escriba
+    directamente en los arrays debe llamar a touch().
+    """
+
+    def __init__(self, rows, cols, walkable=None, risk=None):
+        self.rows = rows
+        self.cols = cols
+        size = rows * cols
+        if walkable is None:
+            walkable = np.ones(size, dtype=np.bool_)
+        if risk is None:
+            risk = np.zeros(size, dtype=np.float32)
+        self.walkable = np.asarray(walkable, dtype=np.bool_).reshape(size)
+        self.risk = np.asarray(risk, dtype=np.float32).reshape(size)
+        #vistas para leer escalares de Python rápido dentro de los bucles
+        self._walk = memoryview(self.walkable)
+        self._risk = memoryview(self.risk)
+        self.version = 0
+
+    @property
+    def size(self):
+        return self.rows * self.cols
+
+    def index(self, row, col):
+        return row * self.cols + col
+
+    def coords(self, i):
+        return divmod(i, self.cols)
+
+    def is_walkable(self, i):
+        return self._walk[i]
+
+    def touch(self):
+        self.version += 1
+
+    def set_barrier(self, row, col):
+        i = self.index(row, col)
+        self.walkable[i] = False
+        self.risk[i] = 0
+        self.version += 1
+
+    def set_risk(self, row, col, risk):
+        i = self.index(row, col)
+        self.walkable[i] = True
+        self.risk[i] = risk
+        self.version += 1
+
+    def clear(self, row, col):
+        i = self.index(row, col)
+        self.walkable[i] = True
+        self.risk[i] = 0
+        self.version += 1
+
+    def neighbors(self, i):
+        """
+        Genera (vecino, coste) para las 8 direcciones transitables.
+        El coste es el del movimiento más el riesgo de la celda de destino.
+        """
+        rows, cols = self.rows, self.cols
+        walk, risk = self._walk, self._risk
+        r, c = divmod(i, cols)
+        for dr, dc, step in DIRECTIONS:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols:
+                j = nr * cols + nc
+                if walk[j]:
+                    yield j, step + risk[j]
+
+    def predecessors(self, i):
+        """
+        Genera (predecesor, coste) de las aristas que entran en i.
+        El riesgo se cobra al entrar, por eso el coste usa el riesgo de i.
+        """
+        rows, cols = self.rows, self.cols
+        walk = self._walk
+        penalty = self._risk[i]
+        r, c = divmod(i, cols)
+        for dr, dc, step in DIRECTIONS:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols:
+                j = nr * cols + nc
+                if walk[j]:
+                    yield j, step + penalty
+
+    def heuristic(self, a, b):
+        #distancia euclidea en celdas, como h() en astar.py
+        ar, ac = divmod(a, self.cols)
+        br, bc = divmod(b, self.cols)
+        return math.sqrt((ar - br) ** 2 + (ac - bc) ** 2)
+
+    def path_cost(self, path):
+        cost = 0.0
+        for a, b in zip(path, path[1:]):
+            ar, ac = divmod(a, self.cols)
+            br, bc = divmod(b, self.cols)
+            step = SQRT2 if ar != br and ac != bc else 1.0
+            cost += step + self._risk[b]
+        return cost
+
+# %% [markdown]
+# # Search
+
+# %%
+
+def reconstruct_path(parent, end):
+    path = [end]
+    while path[-1] in parent:
+        path.append(parent[path[-1]])
+    path.reverse()
+    return path
+
+def find_path(grid, start, end, heuristic=None, on_expand=None, open_set=None, stats=None):
+    """
+    A* desde start hasta end (índices de celda).
+    Parámetros:
+        heuristic: función (celda, end) -> estimación; por defecto la euclidea
+        on_expand: callback opcional que recibe cada celda expandida
+        open_set: "heap", "indexed" o "bucket" (ver openset.py); por defecto
+                  "heap"
+        stats: profiling.SearchStats opcional; si se pasa se usa el bucle
+               instrumentado de profiling.py
+    Retorna:
+        SearchResult(path, cost, expanded); path es None si no hay camino.
+    El estado de la búsqueda son diccionarios dispersos, así que la memoria
+    depende de la zona explorada y no del tamaño de la rejilla.
+    """
+    if stats is not None:
+        from profiling import find_path_profiled  #profiling importa engine
+        return find_path_profiled(grid, start, end, stats, heuristic, on_expand, open_set)
+    if not (grid.is_walkable(start) and grid.is_walkable(end)):
+        return SearchResult(None, math.inf, 0)
+
+    rows, cols = grid.rows, grid.cols
+    walk, risk = grid._walk, grid._risk
+    er, ec = divmod(end, cols)
+    if heuristic is None:
+        def heuristic(i, _end):
+            r, c = divmod(i, cols)
+            return math.sqrt((r - er) ** 2 + (c - ec) ** 2)
+
+    g_score = {start: 0.0}
+    parent = {}
+    closed = set()
+    open_set = make_open_set(open_set)
+    open_set.push(start, heuristic(start, end))
+    expanded = 0
+
+    while open_set:
+        current, _ = open_set.pop()
+        if current == end:
+            return SearchResult(reconstruct_path(parent, end), g_score[end], expanded)
+        closed.add(current)
+        expanded += 1
+
+        g_current = g_score[current]
+        r, c = divmod(current, cols)
+        for dr, dc, step in DIRECTIONS:
+            nr, nc = r + dr, c + dc
+            if not (0 <= nr < rows and 0 <= nc < cols):
+                continue
+            neighbor = nr * cols + nc
+            if not walk[neighbor] or neighbor in closed:
+                continue
+            temp_g_score = g_current + step + risk[neighbor]  #penal
+            if temp_g_score < g_score.get(neighbor, math.inf):
+                g_score[neighbor] = temp_g_score
+                parent[neighbor] = current
+                open_set.push(neighbor, temp_g_score + heuristic(neighbor, end))
+
+        if on_expand is not None:
+            on_expand(current)
+
+    return SearchResult(None, math.inf, expanded)
+
+def dijkstra(grid, source, targets=None, reverse=False):
+    """
+    Dijkstra desde source. Se para cuando todas las celdas de targets están
+    cerradas (o recorre toda la componente si targets es None).
+    Con reverse=True usa las aristas al revés: dist[i] es el coste de i a source.
+    Retorna (dist, parent) como diccionarios.
+    """
+    edges = grid.predecessors if reverse else grid.neighbors
+    pending = set(targets) if targets is not None else None
+    dist = {source: 0.0}
+    parent = {}
+    closed = set()
+    open_set = make_open_set(None)
+    open_set.push(source, 0.0)
+    while open_set:
+        current, d = open_set.pop()
+        closed.add(current)
+        if pending is not None:
+            pending.discard(current)
+            if not pending:
+                break
+        for neighbor, cost in edges(current):
+            if neighbor not in closed and d + cost < dist.get(neighbor, math.inf):
+                dist[neighbor] = d + cost
+                parent[neighbor] = current
+                open_set.push(neighbor, d + cost)
+    return dist, parent
+
+def dijkstra_table(grid, source, reverse=False):
+    """
+    Dijkstra completo desde source sobre arrays densos (sin diccionarios), para
+    mapas grandes. Retorna un array float64 con el coste de source a cada
+    celda, o de cada celda a source con reverse=True; inf = inalcanzable.
+    """
+    rows, cols = grid.rows, grid.cols
+    walk, risk = grid._walk, grid._risk
+    dist = array("d", [math.inf]) * grid.size
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, current = heapq.heappop(heap)
+        if d > dist[current]:
+            continue  #entrada obsoleta
+        r, c = divmod(current, cols)
+        penalty = risk[current]  #al ir hacia atrás se paga el riesgo de current
+        for dr, dc, step in DIRECTIONS:
+            nr, nc = r + dr, c + dc
+            if not (0 <= nr < rows and 0 <= nc < cols):
+                continue
+            neighbor = nr * cols + nc
+            if not walk[neighbor]:
+                continue
+            new_dist = d + step + (penalty if reverse else risk[neighbor])
+            if new_dist < dist[neighbor]:
+                dist[neighbor] = new_dist
+                heapq.heappush(heap, (new_dist, neighbor))
+    return np.frombuffer(dist, dtype=np.float64)
@@ -0,0 +1,104 @@
+# %% [markdown]
+# # Campo de flujo hacia un objetivo común
+#
+# Un único Dijkstra hacia atrás desde end deja, para cada celda, la dirección
+# del siguiente paso en el camino óptimo hacia end. Después cualquier número de
+# agentes sigue el campo en O(longitud del camino) sin buscar nada.
+# El campo es un array int8 (1 byte por celda: índice en DIRECTIONS, -1 si no
+# hay camino); las distancias en float64 solo existen mientras se calcula.
+
+# %%
+
+import heapq
+import math
+from array import array
+
+import numpy as np
+
+from engine import DIRECTIONS
+
+NO_ROUTE = -1
+
+# %%
+
+class FlowField:
+    """
+    Uso:
+        field = FlowField(grid, end)
+        path = field.route(start)
+        agents = field.advance(agents)  #un paso para un array de celdas
+    keep_costs=True guarda además el coste hasta end de cada celda (float32).
+    """
+
+    def __init__(self, grid, end, keep_costs=False):
+        self.grid = grid
+        self.end = end
+        #offsets[-1] (NO_ROUTE) es 0: sin camino el agente no se mueve
+        self.offsets = np.array([dr * grid.cols + dc for dr, dc, _ in DIRECTIONS] + [0], dtype=np.int64)
+        self.directions, costs = self._compute(keep_costs)
+        self.costs = costs
+
+    def _compute(self, keep_costs):
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        walk, risk = grid._walk, grid._risk
+        end = self.end
+        directions = np.full(grid.size, NO_ROUTE, dtype=np.int8)
+        if not walk[end]:
+            return directions, None
+        field = memoryview(directions)
+        #para ir de v a current se usa la dirección opuesta a la de current -> v
+        opposite = [DIRECTIONS.index((-dr, -dc, step)) for dr, dc, step in DIRECTIONS]
+        dist = array("d", [math.inf]) * grid.size
+        dist[end] = 0.0
+        heap = [(0.0, end)]
+        while heap:
+            d, current = heapq.heappop(heap)
+            if d > dist[current]:
+                continue
+            r, c = divmod(current, cols)
+            penalty = risk[current]  #el riesgo se paga al entrar en current
+            for k, (dr, dc, step) in enumerate(DIRECTIONS):
+                nr, nc = r + dr, c + dc
+                if not (0 <= nr < rows and 0 <= nc < cols):
+                    continue
+                neighbor = nr * cols + nc
+                if not walk[neighbor]:
+                    continue
+                new_dist = d + step + penalty
+                if new_dist < dist[neighbor]:
+                    dist[neighbor] = new_dist
+                    field[neighbor] = opposite[k]
+                    heapq.heappush(heap, (new_dist, neighbor))
+        costs = np.frombuffer(dist, dtype=np.float64).astype(np.float32) if keep_costs else None
+        return directions, costs
+
+    def next_step(self, cell):
+        """Siguiente celda hacia end, o None si cell es end o no hay camino."""
+        k = self.directions[cell]
+        if k == NO_ROUTE:
+            return None
+        dr, dc, _ = DIRECTIONS[k]
+        return cell + dr * self.grid.cols + dc
+
+    def route(self, start):
+        if start == self.end:
+            return [start]
+        if self.directions[start] == NO_ROUTE:
+            return None
+        field = memoryview(self.directions)
+        offsets = self.offsets.tolist()
+        path = [start]
+        current = start
+        while current != self.end:
+            current += offsets[field[current]]
+            path.append(current)
+        return path
+
+    def advance(self, cells):
+        """
+        Mueve un paso todos los agentes de cells (array de índices) de forma
+        vectorizada. Los que ya están en end o no tienen camino se quedan quietos.
+        """
+        cells = np.asarray(cells, dtype=np.int64)
+        return cells + self.offsets[self.directions[cells]]
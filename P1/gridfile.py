@@ -0,0 +1,87 @@
+# %% [markdown]
+# # Formato binario de rejilla
+#
+# Un fichero .agrid guarda un engine.Grid sin ningún objeto por celda:
+#     cabecera fija (HEADER, little endian)
+#     waypoints: int64 * waypoint_count
+#     walkable: 1 bit por celda (np.packbits), relleno hasta múltiplo de 8 bytes
+#     risk: float32 por celda, desde risk_offset
+# start y end valen -1 si no hay. Con mmap=True el riesgo (4 de cada 5 bytes
+# del fichero sin comprimir) se mapea en memoria en vez de leerse; los bits de
+# walkable se desempaquetan a 1 byte por celda, que es lo que lee el motor.
+
+# %%
+
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from engine import Grid
+
+MAGIC = b"AGRD"
+FORMAT_VERSION = 1
+# magic, versión, reservado, rows, cols, start, end, waypoint_count, risk_offset
+HEADER = struct.Struct("<4sHHqqqqqq")
+
+GridFile = namedtuple("GridFile", ["grid", "start", "end", "waypoints"])
+
+# %%
+
+def _layout(rows, cols, waypoint_count):
+    bits_offset = HEADER.size + 8 * waypoint_count
+    bits_size = (rows * cols + 7) // 8
+    risk_offset = (bits_offset + bits_size + 7) // 8 * 8
+    return bits_offset, risk_offset
+
+def save_grid(path, grid, start=None, end=None, waypoints=()):
+    """Escribe grid (y opcionalmente inicio, fin y waypoints, como índices) en path."""
+    waypoints = np.asarray(list(waypoints), dtype="<i8")
+    bits_offset, risk_offset = _layout(grid.rows, grid.cols, len(waypoints))
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, grid.rows, grid.cols,
+                            -1 if start is None else start, -1 if end is None else end,
+                            len(waypoints), risk_offset))
+        f.write(waypoints.tobytes())
+        f.write(np.packbits(grid.walkable).tobytes())
+        f.write(b"\0" * (risk_offset - f.tell()))
+        f.write(grid.risk.astype("<f4", copy=False).tobytes())
+
+def read_header(path):
+    with open(path, "rb") as f:
+        data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} es demasiado corto para ser una rejilla")
+    magic, version, _, rows, cols, start, end, waypoint_count, risk_offset = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} no es un fichero de rejilla")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Versión {version} de {path} no soportada")
+    return rows, cols, start, end, waypoint_count, risk_offset
+
+def load_grid(path, mmap=True, writable=False):
+    """
+    Retorna GridFile(grid, start, end, waypoints).
+    mmap: mapea el riesgo en vez de copiarlo. Sin writable el array es de solo
+    lectura; con writable se mapea copy-on-write (los cambios no van al fichero,
+    hay que volver a llamar a save_grid).
+    """
+    rows, cols, start, end, waypoint_count, risk_offset = read_header(path)
+    size = rows * cols
+    bits_offset, expected = _layout(rows, cols, waypoint_count)
+    if risk_offset != expected:
+        raise ValueError(f"Cabecera de {path} inconsistente")
+    waypoints = np.fromfile(path, dtype="<i8", count=waypoint_count, offset=HEADER.size)
+    bits = np.fromfile(path, dtype=np.uint8, count=(size + 7) // 8, offset=bits_offset)
+    if len(bits) * 8 < size:
+        raise ValueError(f"{path} está truncado")
+    walkable = np.unpackbits(bits, count=size).view(np.bool_)
+    if mmap:
+        risk = np.memmap(path, dtype="<f4", mode="c" if writable else "r", offset=risk_offset, shape=(size,))
+    else:
+        risk = np.fromfile(path, dtype="<f4", count=size, offset=risk_offset)
+    if len(risk) != size:
+        raise ValueError(f"{path} está truncado")
+    return GridFile(Grid(rows, cols, walkable, risk),
+                    None if start < 0 else start, None if end < 0 else end,
+                    [int(i) for i in waypoints])
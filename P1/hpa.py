@@ -0,0 +1,288 @@
+# %% [markdown]
+# # Búsqueda jerárquica (HPA*)
+#
+# La rejilla se divide en clusters de cluster_size x cluster_size. En cada
+# frontera entre clusters vecinos se eligen celdas de entrada (el centro de
+# cada tramo libre, o sus dos extremos si el tramo es largo) y dentro de cada
+# cluster se guardan los costes entre entradas, riesgo incluido. Una consulta
+# busca en ese grafo abstracto, mucho más pequeño, y luego refina cada arista
+# con una búsqueda local dentro de su cluster.
+# Una diagonal que cruza una frontera (o la esquina común de cuatro clusters)
+# solo es una transición cuando las dos celdas que la flanquean están
+# bloqueadas: si no, el mismo cruce se hace por un tramo horizontal/vertical.
+# Así la búsqueda abstracta encuentra camino siempre que exista; como en el
+# HPA* original su coste es casi óptimo, porque solo se cruza por las entradas
+# elegidas.
+
+# %%
+
+import math
+
+from engine import SQRT2, SearchResult
+from openset import make_open_set
+
+# tramos libres a partir de esta longitud tienen dos entradas
+LONG_ENTRANCE = 6
+
+# %%
+
+class HierarchicalGrid:
+    """
+    Grafo abstracto cacheado sobre un Grid.
+    Las aristas internas de un cluster se calculan la primera vez que la
+    búsqueda lo necesita (o todas con precompute()) y se guardan. Tras editar
+    celdas del Grid hay que llamar a invalidate(celdas): solo se recalculan el
+    cluster de cada celda y, si cambian sus entradas, el cluster vecino.
+    """
+
+    def __init__(self, grid, cluster_size=16):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-grid.rows // cluster_size)
+        self.cluster_cols = -(-grid.cols // cluster_size)
+        self.transitions = {}  #frontera -> [(a, b)] con a y b a cada lado
+        self.entrances = {}    #cluster -> set de celdas de entrada
+        self.inter = {}        #celda de entrada -> {celda al otro lado: coste del paso}
+        self.intra = {}        #cluster -> {u: {v: coste}}
+        for k in self.clusters():
+            self.entrances[k] = set()
+        for border in self.borders():
+            self._build_border(border)
+
+    def clusters(self):
+        for kr in range(self.cluster_rows):
+            for kc in range(self.cluster_cols):
+                yield (kr, kc)
+
+    def borders(self):
+        for kr, kc in self.clusters():
+            if kc + 1 < self.cluster_cols:
+                yield ((kr, kc), (kr, kc + 1))
+            if kr + 1 < self.cluster_rows:
+                yield ((kr, kc), (kr + 1, kc))
+            if kr + 1 < self.cluster_rows and kc + 1 < self.cluster_cols:
+                #fronteras de esquina, solo con cruces en diagonal
+                yield ((kr, kc), (kr + 1, kc + 1))
+                yield ((kr, kc + 1), (kr + 1, kc))
+
+    def cluster_of(self, i):
+        r, c = divmod(i, self.grid.cols)
+        return (r // self.cluster_size, c // self.cluster_size)
+
+    def bounds(self, k):
+        cs = self.cluster_size
+        kr, kc = k
+        return (kr * cs, min((kr + 1) * cs, self.grid.rows),
+                kc * cs, min((kc + 1) * cs, self.grid.cols))
+
+    #entradas
+
+    def _border_cells(self, border):
+        #pares (a, b) enfrentados a ambos lados de la frontera
+        grid = self.grid
+        ka, kb = border
+        r0, r1, c0, c1 = self.bounds(ka)
+        if ka[0] == kb[0]:
+            return [(grid.index(r, c1 - 1), grid.index(r, c1)) for r in range(r0, r1)]
+        if ka[1] == kb[1]:
+            return [(grid.index(r1 - 1, c), grid.index(r1, c)) for c in range(c0, c1)]
+        return []
+
+    def _diagonal_cells(self, border):
+        #pares (a, b) en diagonal a ambos lados de la frontera, como (fila, columna)
+        ka, kb = border
+        r0, r1, c0, c1 = self.bounds(ka)
+        if ka[0] == kb[0]:
+            return [pair for r in range(r0, r1 - 1)
+                    for pair in (((r, c1 - 1), (r + 1, c1)), ((r + 1, c1 - 1), (r, c1)))]
+        if ka[1] == kb[1]:
+            return [pair for c in range(c0, c1 - 1)
+                    for pair in (((r1 - 1, c), (r1, c + 1)), ((r1 - 1, c + 1), (r1, c)))]
+        if kb[1] > ka[1]:
+            return [((r1 - 1, c1 - 1), (r1, c1))]
+        return [((r1 - 1, c0), (r1, c0 - 1))]
+
+    def _build_border(self, border):
+        grid = self.grid
+        walk = grid._walk
+        for a, b in self.transitions.get(border, ()):
+            self.inter[a].pop(b, None)
+            self.inter[b].pop(a, None)
+        transitions = []
+        run = []
+        for a, b in self._border_cells(border) + [(None, None)]:
+            if a is not None and walk[a] and walk[b]:
+                run.append((a, b))
+                continue
+            if len(run) >= LONG_ENTRANCE:
+                transitions += [run[0], run[-1]]
+            elif run:
+                transitions.append(run[len(run) // 2])
+            run = []
+        #diagonales sin alternativa: las dos celdas de la esquina bloqueadas
+        for (ra, ca), (rb, cb) in self._diagonal_cells(border):
+            a, b = grid.index(ra, ca), grid.index(rb, cb)
+            if walk[a] and walk[b] and not walk[grid.index(ra, cb)] and not walk[grid.index(rb, ca)]:
+                transitions.append((a, b))
+        self.transitions[border] = transitions
+        cols = grid.cols
+        for a, b in transitions:
+            step = 1.0 if a // cols == b // cols or a % cols == b % cols else SQRT2
+            self.inter.setdefault(a, {})[b] = step
+            self.inter.setdefault(b, {})[a] = step
+        for k in border:
+            self._collect_entrances(k)
+
+    def _collect_entrances(self, k):
+        entrances = set()
+        for border, transitions in self._cluster_borders(k):
+            side = 0 if border[0] == k else 1
+            entrances.update(pair[side] for pair in transitions)
+        if entrances != self.entrances[k]:
+            self.entrances[k] = entrances
+            self.intra.pop(k, None)
+
+    def _cluster_borders(self, k):
+        kr, kc = k
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                other = (kr + dr, kc + dc)
+                for border in ((other, k), (k, other)):
+                    if border in self.transitions:
+                        yield border, self.transitions[border]
+
+    def _nearby_borders(self, k):
+        #fronteras entre clusters a distancia 1 de k: las que dependen de su borde
+        kr, kc = k
+        near = lambda other: abs(other[0] - kr) <= 1 and abs(other[1] - kc) <= 1
+        return [border for border in self.transitions if near(border[0]) and near(border[1])]
+
+    #búsqueda local
+
+    def _local_dijkstra(self, source, k, reverse=False, stop=None):
+        """
+        Dijkstra limitado al cluster k. Con reverse=True recorre las aristas
+        al revés (costes desde cada celda hasta source).
+        """
+        r0, r1, c0, c1 = self.bounds(k)
+        cols = self.grid.cols
+        edges = self.grid.predecessors if reverse else self.grid.neighbors
+        dist = {source: 0.0}
+        parent = {}
+        done = set()
+        open_set = make_open_set(None)
+        open_set.push(source, 0.0)
+        while open_set:
+            u, d = open_set.pop()
+            done.add(u)
+            if u == stop:
+                break
+            for v, cost in edges(u):
+                r, c = divmod(v, cols)
+                if r0 <= r < r1 and c0 <= c < c1 and v not in done and d + cost < dist.get(v, math.inf):
+                    dist[v] = d + cost
+                    parent[v] = u
+                    open_set.push(v, d + cost)
+        return dist, parent
+
+    def intra_edges(self, k):
+        edges = self.intra.get(k)
+        if edges is None:
+            entrances = self.entrances[k]
+            edges = {}
+            for u in entrances:
+                dist, _ = self._local_dijkstra(u, k)
+                edges[u] = {v: dist[v] for v in entrances if v != u and v in dist}
+            self.intra[k] = edges
+        return edges
+
+    def precompute(self):
+        for k in self.clusters():
+            self.intra_edges(k)
+
+    def invalidate(self, cells):
+        """Avisa de celdas cuyo riesgo o transitabilidad ha cambiado."""
+        cols = self.grid.cols
+        for i in cells:
+            k = self.cluster_of(i)
+            self.intra.pop(k, None)
+            r, c = divmod(i, cols)
+            r0, r1, c0, c1 = self.bounds(k)
+            #una celda del borde puede cambiar las transiciones de las fronteras
+            #de k y, por las diagonales de esquina, las de sus vecinos
+            if r in (r0, r1 - 1) or c in (c0, c1 - 1):
+                for border in self._nearby_borders(k):
+                    self._build_border(border)
+
+    #consulta
+
+    def find_path(self, start, end, open_set=None):
+        """
+        Camino de start a end. Devuelve SearchResult(path, cost, expanded)
+        con el camino refinado celda a celda; expanded son los nodos del
+        grafo abstracto expandidos.
+        """
+        grid = self.grid
+        if not (grid.is_walkable(start) and grid.is_walkable(end)):
+            return SearchResult(None, math.inf, 0)
+        risk = grid._risk
+        k_start, k_end = self.cluster_of(start), self.cluster_of(end)
+
+        #aristas temporales de start y end con las entradas de su cluster
+        start_dist, _ = self._local_dijkstra(start, k_start)
+        start_edges = {v: start_dist[v] for v in self.entrances[k_start] if v in start_dist and v != start}
+        if k_start == k_end and end in start_dist:
+            start_edges[end] = start_dist[end]
+        end_dist, _ = self._local_dijkstra(end, k_end, reverse=True)
+        to_end = {u: end_dist[u] for u in self.entrances[k_end] if u in end_dist}
+
+        g_score = {start: 0.0}
+        parent = {}
+        closed = set()
+        open_set = make_open_set(open_set)
+        open_set.push(start, grid.heuristic(start, end))
+        expanded = 0
+        while open_set:
+            current, _ = open_set.pop()
+            if current == end:
+                break
+            closed.add(current)
+            expanded += 1
+            if current == start:
+                edges = list(start_edges.items())
+            else:
+                edges = list(self.intra_edges(self.cluster_of(current)).get(current, {}).items())
+            edges += [(v, step + risk[v]) for v, step in self.inter.get(current, {}).items()]
+            if current in to_end:
+                edges.append((end, to_end[current]))
+            for v, cost in edges:
+                if v in closed:
+                    continue
+                temp_g_score = g_score[current] + cost
+                if temp_g_score < g_score.get(v, math.inf):
+                    g_score[v] = temp_g_score
+                    parent[v] = current
+                    open_set.push(v, temp_g_score + grid.heuristic(v, end))
+        else:
+            return SearchResult(None, math.inf, expanded)
+
+        abstract = [end]
+        while abstract[-1] in parent:
+            abstract.append(parent[abstract[-1]])
+        abstract.reverse()
+        return SearchResult(self.refine(abstract), g_score[end], expanded)
+
+    def refine(self, abstract):
+        #cada arista del grafo abstracto se convierte en un tramo de celdas
+        path = [abstract[0]]
+        for u, v in zip(abstract, abstract[1:]):
+            k = self.cluster_of(u)
+            if k != self.cluster_of(v):
+                path.append(v)  #arista entre clusters: celdas adyacentes (o en diagonal)
+                continue
+            _, parent = self._local_dijkstra(u, k, stop=v)
+            leg = [v]
+            while leg[-1] != u:
+                leg.append(parent[leg[-1]])
+            path += leg[-2::-1]
+        return path
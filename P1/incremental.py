@@ -0,0 +1,153 @@
+# %% [markdown]
+# # Replanificación incremental (D* Lite)
+#
+# El planificador busca hacia atrás desde el objetivo y guarda g/rhs entre
+# consultas. Tras editar celdas del Grid solo se reparan los vértices cuya
+# información cambia, así que el coste de replanificar depende del tamaño del
+# cambio y no del mapa. Con el inicio fijo es LPA* sobre el grafo invertido;
+# move_start permite además desplazar el inicio como en D* Lite.
+
+# %%
+
+import math
+
+from engine import SearchResult
+from openset import HeapOpenSet
+
+#margen al comparar claves: las sumas de costes por caminos distintos pueden
+#diferir en el último bit y un vértice empatado con el inicio parecería peor
+EPS = 1e-9
+
+# %%
+
+class DStarLite:
+    """
+    Uso:
+        planner = DStarLite(grid, start, end)
+        planner.compute_path()
+        grid.set_barrier(r, c)
+        planner.update_cells([grid.index(r, c)])
+        planner.compute_path()  #solo repara lo afectado
+    """
+
+    def __init__(self, grid, start, end):
+        self.grid = grid
+        self.start = start
+        self.end = end
+        self.last_start = start
+        self.km = 0.0
+        self.g = {}
+        self.rhs = {end: 0.0}
+        self.open_set = HeapOpenSet()
+        self.open_set.update(end, self._key(end))
+
+    def _h(self, i):
+        return self.grid.heuristic(self.start, i)
+
+    def _key(self, i):
+        best = min(self.g.get(i, math.inf), self.rhs.get(i, math.inf))
+        return (best + self._h(i) + self.km, best)
+
+    def _best_successor(self, i):
+        g = self.g
+        best, best_cost = None, math.inf
+        for j, cost in self.grid.neighbors(i):
+            total = cost + g.get(j, math.inf)
+            if total < best_cost:
+                best, best_cost = j, total
+        return best, best_cost
+
+    def _update_vertex(self, i):
+        if i != self.end:
+            if self.grid.is_walkable(i):
+                self.rhs[i] = self._best_successor(i)[1]
+            else:
+                self.rhs[i] = math.inf
+        g, rhs = self.g.get(i, math.inf), self.rhs.get(i, math.inf)
+        if g != rhs:
+            self.open_set.update(i, self._key(i))
+        else:
+            self.open_set.remove(i)
+
+    @staticmethod
+    def _key_less(a, b):
+        #a < b, pero componentes a menos de EPS (relativo) cuentan como iguales
+        for x, y in zip(a, b):
+            margin = EPS * max(1.0, abs(y)) if y != math.inf else 0.0
+            if x < y - margin:
+                return True
+            if x > y + margin:
+                return False
+        return False
+
+    def _top_key(self):
+        if not self.open_set:
+            return (math.inf, math.inf)
+        return self.open_set.peek()[1]
+
+    def compute_path(self, on_expand=None):
+        """
+        Repara g/rhs hasta que el inicio es consistente y devuelve
+        SearchResult(path, cost, expanded) con las expansiones de esta llamada.
+        """
+        open_set, g, rhs = self.open_set, self.g, self.rhs
+        start = self.start
+        expanded = 0
+        while (self._key_less(self._top_key(), self._key(start))
+               or rhs.get(start, math.inf) != g.get(start, math.inf)):
+            u, k_old = open_set.pop()
+            k_new = self._key(u)
+            if k_old < k_new:
+                open_set.update(u, k_new)
+                continue
+            expanded += 1
+            if g.get(u, math.inf) > rhs.get(u, math.inf):
+                g[u] = rhs[u]
+                for p, _ in self.grid.predecessors(u):
+                    self._update_vertex(p)
+            else:
+                g[u] = math.inf
+                self._update_vertex(u)
+                for p, _ in self.grid.predecessors(u):
+                    self._update_vertex(p)
+            if on_expand is not None:
+                on_expand(u)
+        return SearchResult(self.path(), g.get(start, math.inf), expanded)
+
+    def path(self):
+        if self.g.get(self.start, math.inf) == math.inf:
+            return None
+        path = [self.start]
+        current = self.start
+        while current != self.end:
+            current, _ = self._best_successor(current)
+            if current is None or len(path) > self.grid.size:
+                return None
+            path.append(current)
+        return path
+
+    def update_cells(self, cells):
+        """
+        Avisa de celdas cuyo riesgo o transitabilidad ya se ha cambiado en el
+        Grid. Cambian las aristas que entran y salen de cada celda, así que se
+        revisan la celda y sus 8 vecinas.
+        """
+        rows, cols = self.grid.rows, self.grid.cols
+        touched = set()
+        for i in cells:
+            r, c = divmod(i, cols)
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    nr, nc = r + dr, c + dc
+                    if 0 <= nr < rows and 0 <= nc < cols:
+                        touched.add(nr * cols + nc)
+        for i in touched:
+            if not self.grid.is_walkable(i):
+                self.g.pop(i, None)
+            self._update_vertex(i)
+
+    def move_start(self, start):
+        #el objetivo no cambia; km corrige las claves ya encoladas
+        self.km += self.grid.heuristic(self.last_start, start)
+        self.last_start = start
+        self.start = start
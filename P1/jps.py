@@ -0,0 +1,177 @@
+# %% [markdown]
+# # Jump Point Search
+#
+# Modo JPS para el motor A*. En zonas sin riesgo las 8 direcciones tienen coste
+# uniforme y JPS salta por encima de los caminos simétricos; como la rejilla
+# permite cortar esquinas (igual que Node.update_neighbors) se usan las reglas
+# de vecinos forzados del artículo original de Harabor y Grastien.
+# Las celdas "rugosas" (cualquier celda con riesgo en su entorno 3x3) rompen
+# la simetría: ahí se para el salto y se expanden todas las direcciones, de
+# modo que el coste es el mismo que con find_path.
+
+# %%
+
+import math
+
+from engine import DIRECTIONS, SQRT2, SearchResult
+from openset import make_open_set
+
+# %%
+
+def risk_zone(grid):
+    """Máscara bool de celdas con riesgo > 0 en su entorno 3x3."""
+    risky = (grid.risk > 0).reshape(grid.rows, grid.cols)
+    zone = risky.copy()
+    zone[1:, :] |= risky[:-1, :]
+    zone[:-1, :] |= risky[1:, :]
+    rows = zone.copy()
+    zone[:, 1:] |= rows[:, :-1]
+    zone[:, :-1] |= rows[:, 1:]
+    return zone.reshape(grid.size)
+
+def _sign(x):
+    return (x > 0) - (x < 0)
+
+def expand_path(grid, jump_points):
+    #rellena las celdas intermedias entre puntos de salto consecutivos
+    cols = grid.cols
+    path = [jump_points[0]]
+    for a, b in zip(jump_points, jump_points[1:]):
+        ar, ac = divmod(a, cols)
+        br, bc = divmod(b, cols)
+        dr, dc = _sign(br - ar), _sign(bc - ac)
+        while (ar, ac) != (br, bc):
+            ar, ac = ar + dr, ac + dc
+            path.append(ar * cols + ac)
+    return path
+
+def find_path_jps(grid, start, end, on_expand=None, open_set=None, rough=None):
+    """
+    A* con Jump Point Search. Mismos parámetros y resultado que
+    engine.find_path; expanded cuenta los puntos de salto expandidos y path
+    se devuelve celda a celda.
+    rough: máscara de risk_zone(grid) si ya se tiene calculada.
+    """
+    if not (grid.is_walkable(start) and grid.is_walkable(end)):
+        return SearchResult(None, math.inf, 0)
+    if rough is None:
+        rough = risk_zone(grid)
+    rough = memoryview(rough)
+
+    rows, cols = grid.rows, grid.cols
+    walk, risk = grid._walk, grid._risk
+    er, ec = divmod(end, cols)
+
+    def free(r, c):
+        return 0 <= r < rows and 0 <= c < cols and walk[r * cols + c]
+
+    def jump_straight(r, c, dr, dc):
+        #bucles separados por eje con los índices precalculados: es el
+        #bucle más caliente de JPS
+        i = r * cols + c
+        if dr:
+            left, right = c > 0, c < cols - 1
+            step = dr * cols
+            while True:
+                r += dr
+                i += step
+                if not (0 <= r < rows) or not walk[i]:
+                    return None
+                if i == end or rough[i]:
+                    return i
+                if 0 <= r + dr < rows:
+                    if right and not walk[i + 1] and walk[i + step + 1]:
+                        return i
+                    if left and not walk[i - 1] and walk[i + step - 1]:
+                        return i
+        up, down = r > 0, r < rows - 1
+        while True:
+            c += dc
+            i += dc
+            if not (0 <= c < cols) or not walk[i]:
+                return None
+            if i == end or rough[i]:
+                return i
+            if 0 <= c + dc < cols:
+                if down and not walk[i + cols] and walk[i + cols + dc]:
+                    return i
+                if up and not walk[i - cols] and walk[i - cols + dc]:
+                    return i
+
+    def jump(r, c, dr, dc):
+        if not (dr and dc):
+            return jump_straight(r, c, dr, dc)
+        while True:
+            r, c = r + dr, c + dc
+            if not free(r, c):
+                return None
+            i = r * cols + c
+            if i == end or rough[i]:
+                return i
+            if (not free(r - dr, c) and free(r - dr, c + dc)) or (not free(r, c - dc) and free(r + dr, c - dc)):
+                return i
+            if jump_straight(r, c, dr, 0) is not None or jump_straight(r, c, 0, dc) is not None:
+                return i
+
+    def directions(i, r, c):
+        #todas las direcciones en el inicio y en zonas con riesgo
+        if i not in parent or rough[i]:
+            return [(dr, dc) for dr, dc, _ in DIRECTIONS]
+        pr, pc = divmod(parent[i], cols)
+        dr, dc = _sign(r - pr), _sign(c - pc)
+        if dr and dc:
+            dirs = [(dr, 0), (0, dc), (dr, dc)]
+            if not free(r - dr, c):
+                dirs.append((-dr, dc))
+            if not free(r, c - dc):
+                dirs.append((dr, -dc))
+        elif dr:
+            dirs = [(dr, 0)]
+            if not free(r, c + 1):
+                dirs.append((dr, 1))
+            if not free(r, c - 1):
+                dirs.append((dr, -1))
+        else:
+            dirs = [(0, dc)]
+            if not free(r + 1, c):
+                dirs.append((1, dc))
+            if not free(r - 1, c):
+                dirs.append((-1, dc))
+        return dirs
+
+    g_score = {start: 0.0}
+    parent = {}
+    closed = set()
+    open_set = make_open_set(open_set)
+    open_set.push(start, math.sqrt((start // cols - er) ** 2 + (start % cols - ec) ** 2))
+    expanded = 0
+
+    while open_set:
+        current, _ = open_set.pop()
+        if current == end:
+            jump_points = [end]
+            while jump_points[-1] in parent:
+                jump_points.append(parent[jump_points[-1]])
+            jump_points.reverse()
+            return SearchResult(expand_path(grid, jump_points), g_score[end], expanded)
+        closed.add(current)
+        expanded += 1
+
+        g_current = g_score[current]
+        r, c = divmod(current, cols)
+        for dr, dc in directions(current, r, c):
+            jp = jump(r, c, dr, dc)
+            if jp is None or jp in closed:
+                continue
+            jr, jc = divmod(jp, cols)
+            steps = max(abs(jr - r), abs(jc - c))
+            temp_g_score = g_current + steps * (SQRT2 if dr and dc else 1.0) + risk[jp]
+            if temp_g_score < g_score.get(jp, math.inf):
+                g_score[jp] = temp_g_score
+                parent[jp] = current
+                open_set.push(jp, temp_g_score + math.sqrt((jr - er) ** 2 + (jc - ec) ** 2))
+
+        if on_expand is not None:
+            on_expand(current)
+
+    return SearchResult(None, math.inf, expanded)
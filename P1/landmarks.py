@@ -0,0 +1,153 @@
+# %% [markdown]
+# # Heurística de landmarks (ALT)
+#
+# h() es la distancia euclidea y no sabe nada del riesgo, así que en mapas con
+# muchas celdas de riesgo subestima mucho y A* se parece a Dijkstra. Con
+# landmarks se precalcula, para unas pocas celdas L, el coste real (riesgo
+# incluido) de L a todas las celdas y de todas a L. Por la desigualdad
+# triangular, para cualquier celda v y objetivo t:
+#     coste(v, t) >= d(L, t) - d(L, v)   y   coste(v, t) >= d(v, L) - d(t, L)
+# y el máximo de esas cotas (y de la euclidea) es admisible y consistente.
+
+# %%
+
+import heapq
+import math
+import random
+
+import numpy as np
+
+from engine import DIRECTIONS, dijkstra_table
+
+# %%
+
+class Landmarks:
+    """
+    Tablas de distancias de count landmarks, en float32 (2 * count * 4 bytes
+    por celda). Se reutilizan entre consultas con heuristic(end).
+    Tras editar el Grid, update_cells(celdas) las repara de forma incremental.
+    refresh() las recalcula desde cero.
+    """
+
+    def __init__(self, grid, count=8, seed=0):
+        self.grid = grid
+        self.count = count
+        self.seed = seed
+        self.refresh()
+
+    def refresh(self):
+        grid = self.grid
+        walkable = np.flatnonzero(grid.walkable)
+        rng = random.Random(self.seed)
+        self.cells = []
+        self.forward = []   #d(L, v)
+        self.backward = []  #d(v, L)
+        #selección "farthest": cada landmark es la celda más lejana a los anteriores
+        nearest = np.full(grid.size, np.inf)
+        candidate = int(walkable[rng.randrange(len(walkable))])
+        for _ in range(min(self.count, len(walkable))):
+            forward = dijkstra_table(grid, candidate)
+            self.cells.append(candidate)
+            self.forward.append(forward.astype(np.float32))
+            self.backward.append(dijkstra_table(grid, candidate, reverse=True).astype(np.float32))
+            nearest = np.minimum(nearest, forward)
+            reachable = np.where(np.isfinite(nearest), nearest, -1)
+            candidate = int(np.argmax(reachable))
+        self._update_epsilon()
+
+    def _update_epsilon(self):
+        #margen para que el redondeo a float32 no sobreestime
+        finite = [t[np.isfinite(t)] for t in self.forward + self.backward]
+        top = max((float(t.max()) for t in finite if t.size), default=0.0)
+        self.epsilon = 1e-6 * top
+
+    def heuristic(self, end, base=None):
+        """
+        Función (celda, end) -> cota inferior para find_path(heuristic=...).
+        base: heurística adicional a combinar con max (por defecto la euclidea).
+        """
+        grid = self.grid
+        terms = []
+        for forward, backward in zip(self.forward, self.backward):
+            to_end = float(forward[end])
+            from_end = float(backward[end])
+            terms.append((memoryview(forward) if to_end != math.inf else None, to_end,
+                          memoryview(backward) if from_end != math.inf else None, from_end))
+        if base is None:
+            base = grid.heuristic
+        epsilon = self.epsilon
+
+        def h(i, _end):
+            best = base(i, end)
+            for forward, to_end, backward, from_end in terms:
+                if forward is not None:
+                    value = to_end - forward[i] - epsilon
+                    if value > best:
+                        best = value
+                if backward is not None:
+                    value = backward[i] - from_end - epsilon
+                    if value > best:
+                        best = value
+            return best
+        return h
+
+    def update_cells(self, cells):
+        """
+        Repara las tablas tras cambiar el riesgo o la transitabilidad de cells.
+        Si un coste sube, las tablas viejas siguen siendo cotas válidas; si baja,
+        se propagan las mejoras con un Dijkstra que solo toca las celdas cuyo
+        valor disminuye.
+        """
+        rows, cols = self.grid.rows, self.grid.cols
+        touched = set()
+        for i in cells:
+            r, c = divmod(i, cols)
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    nr, nc = r + dr, c + dc
+                    if 0 <= nr < rows and 0 <= nc < cols:
+                        touched.add(nr * cols + nc)
+        for table in self.forward:
+            self._repair(table, touched, reverse=False)
+        for table in self.backward:
+            self._repair(table, touched, reverse=True)
+        self._update_epsilon()
+
+    def _repair(self, table, touched, reverse):
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        walk, risk = grid._walk, grid._risk
+        dist = memoryview(table)
+
+        def neighbors(u):
+            r, c = divmod(u, cols)
+            for dr, dc, step in DIRECTIONS:
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < rows and 0 <= nc < cols:
+                    v = nr * cols + nc
+                    if walk[v]:
+                        yield v, step
+
+        #hacia delante la tabla sigue aristas v -> u (se paga el riesgo de u);
+        #hacia atrás sigue u -> v del grafo (se paga el de v)
+        heap = []
+        for u in touched:
+            if not walk[u]:
+                continue
+            best = dist[u]
+            for v, step in neighbors(u):
+                value = dist[v] + step + (risk[v] if reverse else risk[u])
+                if value < best:
+                    best = value
+            if best < dist[u]:
+                dist[u] = best
+                heapq.heappush(heap, (dist[u], u))  #valor ya redondeado a float32
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, step in neighbors(u):
+                value = d + step + (risk[u] if reverse else risk[v])
+                if value < dist[v]:
+                    dist[v] = value
+                    heapq.heappush(heap, (dist[v], v))
@@ -0,0 +1,152 @@
+# %% [markdown]
+# # Mapas para pruebas y benchmarks
+#
+# Generadores reproducibles (todos reciben seed) y lector del formato de
+# texto de MovingAI (.map / .scen), todos devolviendo un engine.Grid.
+
+# %%
+
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from engine import Grid
+
+Scenario = namedtuple("Scenario", ["bucket", "map", "start", "end", "optimal"])
+
+# %% [markdown]
+# # Mapas sintéticos
+
+# %%
+
+def _free_corners(grid):
+    #(0, 0) y (rows-1, cols-1) siempre libres para usarlos como inicio y fin
+    for i in (0, grid.size - 1):
+        grid.walkable[i] = True
+        grid.risk[i] = 0
+    return grid
+
+def random_grid(rows, cols, obstacle_density=0.2, risk_density=0.1, max_risk=10.0, seed=0):
+    """Obstáculos y celdas de riesgo repartidos al azar."""
+    rng = np.random.default_rng(seed)
+    size = rows * cols
+    walkable = rng.random(size) >= obstacle_density
+    risky = rng.random(size) < risk_density
+    risk = np.where(risky & walkable, rng.uniform(0.1, max_risk, size), 0).astype(np.float32)
+    return _free_corners(Grid(rows, cols, walkable, risk))
+
+def maze_grid(rows, cols, seed=0):
+    """
+    Laberinto perfecto (backtracking iterativo) sobre las celdas de fila y
+    columna pares; las paredes ocupan una celda.
+    """
+    rng = np.random.default_rng(seed)
+    walkable = np.zeros((rows, cols), dtype=np.bool_)
+    walkable[0, 0] = True
+    stack = [(0, 0)]
+    while stack:
+        r, c = stack[-1]
+        options = [(dr, dc) for dr, dc in ((0, 2), (0, -2), (2, 0), (-2, 0))
+                   if 0 <= r + dr < rows and 0 <= c + dc < cols and not walkable[r + dr, c + dc]]
+        if not options:
+            stack.pop()
+            continue
+        dr, dc = options[rng.integers(len(options))]
+        walkable[r + dr // 2, c + dc // 2] = True
+        walkable[r + dr, c + dc] = True
+        stack.append((r + dr, c + dc))
+    grid = Grid(rows, cols, walkable)
+    #con dimensiones pares la última fila/columna queda fuera del laberinto
+    grid.walkable.reshape(rows, cols)[rows - 1, :] |= rows % 2 == 0
+    grid.walkable.reshape(rows, cols)[:, cols - 1] |= cols % 2 == 0
+    return _free_corners(grid)
+
+def rooms_grid(rows, cols, room_size=16, doors=2, seed=0):
+    """Habitaciones de room_size x room_size separadas por muros con puertas."""
+    rng = np.random.default_rng(seed)
+    walkable = np.ones((rows, cols), dtype=np.bool_)
+    walkable[::room_size, :] = False
+    walkable[:, ::room_size] = False
+    for r0 in range(0, rows, room_size):
+        for c0 in range(0, cols, room_size):
+            #puertas en el muro de arriba y en el de la izquierda de cada habitación
+            span_c = min(room_size - 1, cols - c0 - 1)
+            span_r = min(room_size - 1, rows - r0 - 1)
+            for _ in range(doors):
+                if r0 > 0 and span_c > 0:
+                    walkable[r0, c0 + 1 + rng.integers(span_c)] = True
+                if c0 > 0 and span_r > 0:
+                    walkable[r0 + 1 + rng.integers(span_r), c0] = True
+    return _free_corners(Grid(rows, cols, walkable))
+
+def add_risk_field(grid, blobs=8, max_risk=10.0, radius=None, seed=0):
+    """
+    Suma al riesgo del Grid varias manchas gaussianas (zonas peligrosas
+    continuas en vez de celdas sueltas). Modifica grid y lo devuelve.
+    """
+    rng = np.random.default_rng(seed)
+    if radius is None:
+        radius = max(2.0, min(grid.rows, grid.cols) / 10)
+    rr, cc = np.mgrid[0:grid.rows, 0:grid.cols]
+    field = np.zeros((grid.rows, grid.cols), dtype=np.float32)
+    for _ in range(blobs):
+        r0, c0 = rng.uniform(0, grid.rows), rng.uniform(0, grid.cols)
+        field += (max_risk * np.exp(-((rr - r0) ** 2 + (cc - c0) ** 2) / (2 * radius ** 2))).astype(np.float32)
+    field[field < 0.1] = 0
+    grid.risk[:] = np.where(grid.walkable, grid.risk + field.reshape(grid.size), 0)
+    grid.touch()
+    return _free_corners(grid)
+
+SYNTHETIC = {
+    "random": lambda size, seed: random_grid(size, size, 0.2, 0.1, seed=seed),
+    "maze": lambda size, seed: maze_grid(size, size, seed=seed),
+    "rooms": lambda size, seed: rooms_grid(size, size, seed=seed),
+    "riskfield": lambda size, seed: add_risk_field(random_grid(size, size, 0.1, 0.0, seed=seed), seed=seed),
+}
+
+# %% [markdown]
+# # Formato MovingAI
+
+# %%
+
+#'.', 'G' y 'S' (pantano) son transitables; '@', 'O', 'T' y 'W' no
+PASSABLE = ".GS"
+
+def load_movingai_map(path):
+    with open(path, "r", encoding="utf-8") as f:
+        header = {}
+        line = f.readline().strip()
+        while line != "map":
+            if not line:
+                raise ValueError(f"Cabecera incompleta en {path}")
+            key, value = line.split(None, 1)
+            header[key] = value
+            line = f.readline().strip()
+        rows, cols = int(header["height"]), int(header["width"])
+        walkable = np.zeros((rows, cols), dtype=np.bool_)
+        for r in range(rows):
+            line = f.readline().rstrip("\r\n")
+            if len(line) < cols:
+                raise ValueError(f"Fila {r} de {path} tiene {len(line)} columnas, se esperaban {cols}")
+            walkable[r] = [ch in PASSABLE for ch in line[:cols]]
+    return Grid(rows, cols, walkable)
+
+def load_movingai_scen(path, grid=None):
+    """
+    Escenarios de un .scen (version 1). Si se pasa grid, start y end son
+    índices de celda; si no, tuplas (fila, columna).
+    """
+    scenarios = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\r\n").split("\t")
+            if len(parts) < 9:
+                continue  #"version 1" u otras líneas sin escenario
+            bucket, map_name = int(parts[0]), parts[1]
+            sx, sy, gx, gy = (int(p) for p in parts[4:8])
+            start, end = (sy, sx), (gy, gx)  #x es la columna, y la fila
+            if grid is not None:
+                start, end = grid.index(*start), grid.index(*end)
+            scenarios.append(Scenario(bucket, os.path.basename(map_name), start, end, float(parts[8])))
+    return scenarios
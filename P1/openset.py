@@ -0,0 +1,255 @@
+# %% [markdown]
+# # Open sets para A*
+#
+# Todas las estructuras comparten la misma interfaz:
+#   push(item, priority) inserta o, si item ya está, baja su prioridad
+#   pop() devuelve (item, priority) con la prioridad mínima
+#   len(), item in open_set
+# Los empates se resuelven por orden de inserción, como el contador de a_star.
+
+# %%
+
+import heapq
+import itertools
+
+# %% [markdown]
+# # Heap con borrado perezoso
+
+# %%
+
+class HeapOpenSet:
+    """
+    heapq de toda la vida: cada mejora se vuelve a insertar y las entradas
+    obsoletas se descartan al sacarlas.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.priority = {}
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.priority)
+
+    def __contains__(self, item):
+        return item in self.priority
+
+    def push(self, item, priority):
+        old = self.priority.get(item)
+        if old is not None and old <= priority:
+            return False
+        self.priority[item] = priority
+        heapq.heappush(self.heap, (priority, next(self.counter), item))
+        return True
+
+    def pop(self):
+        while True:
+            priority, _, item = heapq.heappop(self.heap)
+            if self.priority.get(item) == priority:
+                del self.priority[item]
+                return item, priority
+
+    def peek(self):
+        heap = self.heap
+        while heap:
+            priority, _, item = heap[0]
+            if self.priority.get(item) == priority:
+                return item, priority
+            heapq.heappop(heap)
+        raise IndexError("peek on an empty open set")
+
+    def update(self, item, priority):
+        #cambia la prioridad aunque sea mayor (lo necesitan LPA*/D* Lite)
+        if self.priority.get(item) == priority:
+            return
+        self.priority[item] = priority
+        heapq.heappush(self.heap, (priority, next(self.counter), item))
+
+    def remove(self, item):
+        self.priority.pop(item, None)
+
+# %% [markdown]
+# # Heap binario indexado
+
+# %%
+
+class IndexedHeap:
+    """
+    Heap binario con un índice item -> posición, de modo que bajar la
+    prioridad de un elemento ya abierto es un sift-up en O(log n) y no deja
+    entradas duplicadas.
+    """
+
+    def __init__(self):
+        self.heap = []  #lista de [priority, seq, item]
+        self.position = {}
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return item in self.position
+
+    def push(self, item, priority):
+        pos = self.position.get(item)
+        if pos is None:
+            self.heap.append([priority, next(self.counter), item])
+            self._sift_up(len(self.heap) - 1)
+            return True
+        entry = self.heap[pos]
+        if entry[0] <= priority:
+            return False
+        entry[0] = priority  #decrease-key
+        self._sift_up(pos)
+        return True
+
+    def pop(self):
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        del self.position[top[2]]
+        if heap:
+            heap[0] = last
+            self.position[last[2]] = 0
+            self._sift_down(0)
+        return top[2], top[0]
+
+    def peek(self):
+        if not self.heap:
+            raise IndexError("peek on an empty open set")
+        top = self.heap[0]
+        return top[2], top[0]
+
+    def _sift_up(self, pos):
+        heap, position = self.heap, self.position
+        entry = heap[pos]
+        key = (entry[0], entry[1])
+        while pos > 0:
+            parent = (pos - 1) >> 1
+            other = heap[parent]
+            if (other[0], other[1]) <= key:
+                break
+            heap[pos] = other
+            position[other[2]] = pos
+            pos = parent
+        heap[pos] = entry
+        position[entry[2]] = pos
+
+    def _sift_down(self, pos):
+        heap, position = self.heap, self.position
+        size = len(heap)
+        entry = heap[pos]
+        key = (entry[0], entry[1])
+        while True:
+            child = 2 * pos + 1
+            if child >= size:
+                break
+            right = child + 1
+            if right < size and (heap[right][0], heap[right][1]) < (heap[child][0], heap[child][1]):
+                child = right
+            other = heap[child]
+            if key <= (other[0], other[1]):
+                break
+            heap[pos] = other
+            position[other[2]] = pos
+            pos = child
+        heap[pos] = entry
+        position[entry[2]] = pos
+
+# %% [markdown]
+# # Cola de cubetas
+
+# %%
+
+class BucketQueue:
+    """
+    Cola de cubetas para costes escalados a enteros: la cubeta de una
+    prioridad p es int(p * scale). Dentro de cada cubeta se guarda un heap
+    pequeño con la prioridad exacta, así el orden de extracción es el mismo
+    que con un heap y el camino sigue siendo óptimo.
+    Con una heurística consistente las f de A* no decrecen, por lo que el
+    cursor solo avanza y el coste amortizado de buscar la cubeta mínima es
+    proporcional al rango de costes.
+    """
+
+    def __init__(self, scale=10):
+        self.scale = scale
+        self.buckets = {}
+        self.priority = {}
+        self.current = None
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.priority)
+
+    def __contains__(self, item):
+        return item in self.priority
+
+    def push(self, item, priority):
+        old = self.priority.get(item)
+        if old is not None and old <= priority:
+            return False
+        self.priority[item] = priority  #la entrada vieja queda obsoleta
+        key = int(priority * self.scale)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = []
+        heapq.heappush(bucket, (priority, next(self.counter), item))
+        if self.current is None or key < self.current:
+            self.current = key
+        return True
+
+    def pop(self):
+        if not self.priority:
+            raise IndexError("pop from an empty bucket queue")
+        buckets = self.buckets
+        while True:
+            bucket = buckets.get(self.current)
+            if not bucket:
+                buckets.pop(self.current, None)
+                self.current += 1
+                continue
+            priority, _, item = heapq.heappop(bucket)
+            if self.priority.get(item) == priority:
+                del self.priority[item]
+                if not self.priority:
+                    self.buckets.clear()
+                    self.current = None
+                return item, priority
+
+    def peek(self):
+        if not self.priority:
+            raise IndexError("peek on an empty bucket queue")
+        buckets = self.buckets
+        while True:
+            bucket = buckets.get(self.current)
+            if not bucket:
+                buckets.pop(self.current, None)
+                self.current += 1
+                continue
+            priority, _, item = bucket[0]
+            if self.priority.get(item) == priority:
+                return item, priority
+            heapq.heappop(bucket)
+
+OPEN_SETS = {
+    "heap": HeapOpenSet,
+    "indexed": IndexedHeap,
+    "bucket": BucketQueue,
+}
+
+def make_open_set(kind):
+    """
+    Acepta un nombre de OPEN_SETS, una clase/fábrica o None. Por defecto se
+    usa HeapOpenSet: en CPython heapq está en C y gana al heap indexado en
+    tiempo aunque expandan los mismos nodos (ver bench.py).
+    """
+    if kind is None:
+        return HeapOpenSet()
+    if isinstance(kind, str):
+        try:
+            return OPEN_SETS[kind]()
+        except KeyError:
+            raise ValueError(f"Open set desconocido: {kind!r} (opciones: {', '.join(OPEN_SETS)})") from None
+    return kind()
@@ -0,0 +1,165 @@
+# %% [markdown]
+# # Estadísticas y traza de A*
+#
+# find_path(..., stats=SearchStats()) rellena el objeto con lo que hizo la
+# búsqueda. Sin stats, find_path no cambia: la versión instrumentada es un
+# bucle aparte (find_path_profiled) y el único coste es comprobar stats una
+# vez por búsqueda.
+
+# %%
+
+import csv
+import json
+import math
+import time
+
+from engine import DIRECTIONS, SearchResult, reconstruct_path
+from openset import make_open_set
+
+# columnas de cada fila de la traza
+TRACE_FIELDS = ("step", "cell", "g", "f", "open_size", "generated", "reopened")
+
+# %%
+
+class SearchStats:
+    """
+    Contadores de una búsqueda (se acumulan si se reutiliza el objeto):
+        expanded: nodos sacados de OPEN y expandidos
+        generated: vecinos alcanzados por primera vez
+        reopened: vecinos ya generados cuyo g mejora y vuelven a OPEN
+        closed_skips: vecinos descartados por estar ya cerrados
+        peak_open: tamaño máximo de OPEN
+        heuristic_time / neighbor_time / total_time: segundos; neighbor_time
+            es la expansión de vecinos sin contar las llamadas a la heurística
+    Con trace=True guarda además una fila por expansión (ver TRACE_FIELDS).
+    """
+
+    def __init__(self, trace=False):
+        self.expanded = 0
+        self.generated = 0
+        self.reopened = 0
+        self.closed_skips = 0
+        self.peak_open = 0
+        self.heuristic_calls = 0
+        self.heuristic_time = 0.0
+        self.neighbor_time = 0.0
+        self.total_time = 0.0
+        self.trace = [] if trace else None
+
+    def as_dict(self):
+        return {
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "reopened": self.reopened,
+            "closed_skips": self.closed_skips,
+            "peak_open": self.peak_open,
+            "heuristic_calls": self.heuristic_calls,
+            "heuristic_time": self.heuristic_time,
+            "neighbor_time": self.neighbor_time,
+            "total_time": self.total_time,
+        }
+
+    def to_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=1)
+
+    def write_trace(self, path):
+        """Traza por expansión en CSV, o en JSON lines si path acaba en .jsonl."""
+        if self.trace is None:
+            raise ValueError("SearchStats creado sin trace=True")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            if path.endswith(".jsonl"):
+                for row in self.trace:
+                    f.write(json.dumps(dict(zip(TRACE_FIELDS, row))) + "\n")
+            else:
+                writer = csv.writer(f)
+                writer.writerow(TRACE_FIELDS)
+                writer.writerows(self.trace)
+
+# %%
+
+def find_path_profiled(grid, start, end, stats, heuristic=None, on_expand=None, open_set=None):
+    """Igual que engine.find_path, pero rellenando stats (un SearchStats)."""
+    clock = time.perf_counter
+    t_start = clock()
+    if not (grid.is_walkable(start) and grid.is_walkable(end)):
+        return SearchResult(None, math.inf, 0)
+
+    rows, cols = grid.rows, grid.cols
+    walk, risk = grid._walk, grid._risk
+    er, ec = divmod(end, cols)
+    if heuristic is None:
+        def heuristic(i, _end):
+            r, c = divmod(i, cols)
+            return math.sqrt((r - er) ** 2 + (c - ec) ** 2)
+
+    trace = stats.trace
+    g_score = {start: 0.0}
+    parent = {}
+    closed = set()
+    open_set = make_open_set(open_set)
+    open_set.push(start, heuristic(start, end))
+    stats.heuristic_calls += 1
+    stats.generated += 1
+    peak_open = max(stats.peak_open, 1)
+    expanded = 0
+    h_time = 0.0
+    n_time = 0.0
+
+    try:
+        while open_set:
+            current, f_current = open_set.pop()
+            if current == end:
+                return SearchResult(reconstruct_path(parent, end), g_score[end], expanded)
+            closed.add(current)
+            expanded += 1
+
+            t0 = clock()
+            h_spent = 0.0
+            generated = reopened = 0
+            g_current = g_score[current]
+            r, c = divmod(current, cols)
+            for dr, dc, step in DIRECTIONS:
+                nr, nc = r + dr, c + dc
+                if not (0 <= nr < rows and 0 <= nc < cols):
+                    continue
+                neighbor = nr * cols + nc
+                if not walk[neighbor]:
+                    continue
+                if neighbor in closed:
+                    stats.closed_skips += 1
+                    continue
+                temp_g_score = g_current + step + risk[neighbor]  #penal
+                old_g = g_score.get(neighbor, math.inf)
+                if temp_g_score < old_g:
+                    if old_g == math.inf:
+                        generated += 1
+                    else:
+                        reopened += 1
+                    g_score[neighbor] = temp_g_score
+                    parent[neighbor] = current
+                    t1 = clock()
+                    h = heuristic(neighbor, end)
+                    h_spent += clock() - t1
+                    open_set.push(neighbor, temp_g_score + h)
+            n_time += clock() - t0 - h_spent
+            h_time += h_spent
+            stats.heuristic_calls += generated + reopened
+            stats.generated += generated
+            stats.reopened += reopened
+            size = len(open_set)
+            if size > peak_open:
+                peak_open = size
+            if trace is not None:
+                trace.append((stats.expanded + expanded, current, g_current, f_current, size, generated, reopened))
+
+            if on_expand is not None:
+                on_expand(current)
+
+        return SearchResult(None, math.inf, expanded)
+    finally:
+        stats.expanded += expanded
+        stats.peak_open = peak_open
+        stats.heuristic_time += h_time
+        stats.neighbor_time += n_time
+        stats.total_time += clock() - t_start
@@ -0,0 +1,66 @@
+# %% [markdown]
+# # Rejilla en memoria compartida
+#
+# Copia walkable y risk de un Grid en bloques de multiprocessing.shared_memory
+# para que los procesos de un pool lean la misma rejilla sin serializarla en
+# cada tarea. Los workers la ven como un Grid de solo lectura.
+
+# %%
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from engine import Grid
+
+# %%
+
+class SharedGrid:
+    """
+    Uso:
+        with SharedGrid(grid) as shared:
+            pool = ProcessPoolExecutor(initializer=init_worker, initargs=(shared.handle,))
+    handle es una tupla pequeña y serializable que describe los bloques.
+    """
+
+    def __init__(self, grid):
+        self.walk_shm = shared_memory.SharedMemory(create=True, size=grid.size)
+        self.risk_shm = shared_memory.SharedMemory(create=True, size=grid.size * 4)
+        np.ndarray(grid.size, dtype=np.bool_, buffer=self.walk_shm.buf)[:] = grid.walkable
+        np.ndarray(grid.size, dtype=np.float32, buffer=self.risk_shm.buf)[:] = grid.risk
+        self.handle = (grid.rows, grid.cols, self.walk_shm.name, self.risk_shm.name)
+
+    def close(self):
+        for shm in (self.walk_shm, self.risk_shm):
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def attach_grid(handle):
+    """Devuelve (grid, bloques); hay que mantener vivos los bloques mientras se use grid."""
+    rows, cols, walk_name, risk_name = handle
+    blocks = [shared_memory.SharedMemory(name=walk_name), shared_memory.SharedMemory(name=risk_name)]
+    walkable = np.ndarray(rows * cols, dtype=np.bool_, buffer=blocks[0].buf)
+    risk = np.ndarray(rows * cols, dtype=np.float32, buffer=blocks[1].buf)
+    walkable.flags.writeable = False
+    risk.flags.writeable = False
+    return Grid(rows, cols, walkable, risk), blocks
+
+# %% [markdown]
+# # Estado de cada worker
+
+# %%
+
+_worker = {}
+
+def init_worker(handle):
+    #initializer del pool: cada proceso se engancha una vez a la rejilla
+    _worker["grid"], _worker["blocks"] = attach_grid(handle)
+
+def worker_grid():
+    return _worker["grid"]
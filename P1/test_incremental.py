@@ -0,0 +1,34 @@
+import math
+import random
+
+from engine import find_path
+from incremental import DStarLite
+from maps import random_grid
+
+def test_replan_matches_find_path_after_random_edits():
+    #las claves empatadas con el inicio no deben cortar la reparación antes de
+    #tiempo (diferencias de redondeo en el último bit de las sumas de costes)
+    for seed in range(300):
+        rng = random.Random(seed)
+        grid = random_grid(6, 6, 0.2, 0.3, 5.0, seed=seed)
+        grid.clear(0, 0)
+        grid.clear(5, 5)
+        planner = DStarLite(grid, 0, grid.size - 1)
+        planner.compute_path()
+        for _ in range(6):
+            row, col = rng.randrange(6), rng.randrange(6)
+            if (row, col) in ((0, 0), (5, 5)):
+                continue
+            choice = rng.random()
+            if choice < 0.3:
+                grid.set_barrier(row, col)
+            elif choice < 0.6:
+                grid.clear(row, col)
+            else:
+                grid.set_risk(row, col, round(rng.random(), 1))
+            planner.update_cells([grid.index(row, col)])
+            result = planner.compute_path()
+            expected = find_path(grid, 0, grid.size - 1)
+            assert (result.path is None) == (expected.path is None), seed
+            if expected.path is not None:
+                assert math.isclose(result.cost, expected.cost, rel_tol=1e-9), seed
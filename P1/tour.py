@@ -0,0 +1,182 @@
+# %% [markdown]
+# # Orden óptimo de waypoints
+#
+# Modo multiobjetivo para find_path_with_waypoints: se calculan todos los
+# tramos entre inicio, waypoints y fin (un Dijkstra por punto, repartidos en
+# un pool de procesos sobre la rejilla compartida), se elige el orden de
+# visita y se encadenan los tramos ya calculados.
+# Los costes son dirigidos (el riesgo se paga al entrar), así que la matriz no
+# es simétrica y se trata como un TSP asimétrico con inicio y fin fijos.
+
+# %%
+
+import math
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import dijkstra
+from shared import SharedGrid, init_worker, worker_grid
+
+# hasta este número de waypoints el orden se calcula exacto (Held-Karp)
+EXACT_LIMIT = 12
+
+TourResult = namedtuple("TourResult", ["order", "path", "cost"])
+
+# %% [markdown]
+# # Tabla de tramos
+
+# %%
+
+def _legs_from(grid, source, points):
+    dist, parent = dijkstra(grid, source, targets=points)
+    legs = {}
+    for target in points:
+        if target == source or target not in dist:
+            continue
+        path = [target]
+        while path[-1] != source:
+            path.append(parent[path[-1]])
+        legs[target] = (dist[target], path[::-1])
+    return source, legs
+
+def _worker_legs_from(source, points):
+    return _legs_from(worker_grid(), source, points)
+
+def leg_table(grid, points, processes=None):
+    """
+    Costes y caminos de todos los tramos entre points (índices de celda).
+    Retorna (cost, legs): cost[a][b] es el coste del tramo a -> b entre
+    posiciones de points (inf si no hay camino) y legs[(a, b)] su camino.
+    processes=1 calcula todo en este proceso.
+    """
+    unique = list(dict.fromkeys(points))
+    if processes == 1 or len(unique) <= 2:
+        results = [_legs_from(grid, source, unique) for source in unique]
+    else:
+        with SharedGrid(grid) as shared, \
+                ProcessPoolExecutor(processes, initializer=init_worker, initargs=(shared.handle,)) as pool:
+            results = list(pool.map(_worker_legs_from, unique, [unique] * len(unique)))
+    by_cell = dict(results)
+
+    n = len(points)
+    cost = [[math.inf] * n for _ in range(n)]
+    legs = {}
+    for a in range(n):
+        for b in range(n):
+            if points[a] == points[b]:
+                cost[a][b] = 0.0
+                legs[(a, b)] = [points[a]]
+            elif points[b] in by_cell[points[a]]:
+                cost[a][b], legs[(a, b)] = by_cell[points[a]][points[b]]
+    return cost, legs
+
+# %% [markdown]
+# # Orden de visita
+
+# %%
+
+def route_cost(cost, route):
+    return sum(cost[a][b] for a, b in zip(route, route[1:]))
+
+def held_karp(cost):
+    """
+    Orden exacto con inicio 0 y fin n-1 fijos, O(2^k k^2) para k waypoints.
+    """
+    n = len(cost)
+    k = n - 2
+    if k <= 0:
+        return list(range(n))
+    full = (1 << k) - 1
+    #best[mask][j]: coste mínimo desde el inicio visitando mask y acabando en el waypoint j
+    best = [[math.inf] * k for _ in range(1 << k)]
+    back = [[-1] * k for _ in range(1 << k)]
+    for j in range(k):
+        best[1 << j][j] = cost[0][j + 1]
+    for mask in range(1, 1 << k):
+        row = best[mask]
+        for j in range(k):
+            if row[j] == math.inf or not mask & (1 << j):
+                continue
+            for nxt in range(k):
+                if mask & (1 << nxt):
+                    continue
+                new_mask = mask | (1 << nxt)
+                value = row[j] + cost[j + 1][nxt + 1]
+                if value < best[new_mask][nxt]:
+                    best[new_mask][nxt] = value
+                    back[new_mask][nxt] = j
+    last = min(range(k), key=lambda j: best[full][j] + cost[j + 1][n - 1])
+    if best[full][last] + cost[last + 1][n - 1] == math.inf:
+        #algún punto es inalcanzable: no hay orden válido, se deja el dado
+        return list(range(n))
+    order = []
+    mask = full
+    while last != -1:
+        order.append(last + 1)
+        mask, last = mask & ~(1 << last), back[mask][last]
+    return [0] + order[::-1] + [n - 1]
+
+def improve_route(cost, route):
+    """
+    Vecino más cercano ya construido -> 2-opt y recolocación de un punto
+    hasta que ningún movimiento mejora. Se evalúa el coste completo de cada
+    candidato porque invertir un tramo cambia los costes dirigidos.
+    """
+    best = route_cost(cost, route)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(route) - 2):
+            for j in range(i + 1, len(route) - 1):
+                candidate = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+                value = route_cost(cost, candidate)
+                if value < best:
+                    route, best, improved = candidate, value, True
+        for i in range(1, len(route) - 1):
+            rest = route[:i] + route[i + 1:]
+            for j in range(1, len(rest)):
+                candidate = rest[:j] + [route[i]] + rest[j:]
+                value = route_cost(cost, candidate)
+                if value < best:
+                    route, best, improved = candidate, value, True
+                    break
+    return route
+
+def nearest_neighbor(cost):
+    n = len(cost)
+    route = [0]
+    remaining = set(range(1, n - 1))
+    while remaining:
+        nxt = min(remaining, key=lambda j: cost[route[-1]][j])
+        route.append(nxt)
+        remaining.remove(nxt)
+    return route + [n - 1]
+
+def order_points(cost, exact_limit=EXACT_LIMIT):
+    if len(cost) - 2 <= exact_limit:
+        return held_karp(cost)
+    return improve_route(cost, nearest_neighbor(cost))
+
+# %% [markdown]
+# # Ruta completa
+
+# %%
+
+def plan_tour(grid, start, waypoints, end, processes=None, exact_limit=EXACT_LIMIT):
+    """
+    Mejor orden para visitar waypoints entre start y end (índices de celda).
+    Retorna TourResult(order, path, cost); order son las posiciones de
+    waypoints en el orden de visita (siempre todas) y path es None, con
+    cost inf, si algún tramo no existe.
+    """
+    points = [start] + list(waypoints) + [end]
+    cost, legs = leg_table(grid, points, processes)
+    route = order_points(cost, exact_limit)
+    order = [p - 1 for p in route[1:-1]]
+    total = route_cost(cost, route)
+    if total == math.inf:
+        return TourResult(order, None, math.inf)
+    path = [start]
+    for a, b in zip(route, route[1:]):
+        path += legs[(a, b)][1:]
+    return TourResult(order, path, total)
@@ -1,78 +1,38 @@
 import csv
-import math
 import tkinter as tk
+from functools import lru_cache
 from tkinter import messagebox, simpledialog
 
-# Leer el archivo de atributos
-with open("./P2/P2/AtributosJuego.txt", "r", encoding="utf-8") as f:
-    atributos = f.readline().strip().split(",")
-
-# Leer el archivo de datos
-datos = []
-with open("./P2/P2/Juego.txt", "r", encoding="utf-8") as f:
-    reader = csv.reader(f)  # Lee el archivo como CSV
-    for fila in reader:
-        datos.append(fila)
-
-# Fórmula de información o entropía
-def infor(listaEjemplos):
-    total = len(listaEjemplos)
-    if total == 0:
-        return 0
-    count_si = sum(1 for ejemplo in listaEjemplos if ejemplo[4] == 'si')
-    count_no = total - count_si  
-    p_si = count_si / total
-    p_no = count_no / total
-    if p_si == 0 or p_no == 0:
-        return 0
-    return -(p_si * math.log2(p_si) + p_no * math.log2(p_no))
-
-# Fórmula del mérito
-def merito(atributo, listaEjemplos):
-    indice_atributo = atributos.index(atributo)
-    valores = set(ejemplo[indice_atributo] for ejemplo in listaEjemplos)
-    entropia_total = infor(listaEjemplos)
-    entropia_condicional = 0
-    for valor in valores:
-        ejemplos_filtrados = [ejemplo for ejemplo in listaEjemplos if ejemplo[indice_atributo] == valor]
-        p_valor = len(ejemplos_filtrados) / len(listaEjemplos)
-        entropia_condicional += p_valor * infor(ejemplos_filtrados)
-    return entropia_total - entropia_condicional
-
-# Algoritmo ID3 modificado para retornar 'SI' o 'NO'
+from dataset import Dataset
+from model import modelo_guardado, modelo_para
+from tree import clasificar, construir_arbol
+
+RUTA_ATRIBUTOS = "./P2/P2/AtributosJuego.txt"
+RUTA_DATOS = "./P2/P2/Juego.txt"
+
+# Los ficheros se leen la primera vez que hacen falta, no al importar
+@lru_cache(maxsize=None)
+def leer_atributos():
+    with open(RUTA_ATRIBUTOS, "r", encoding="utf-8") as f:
+        return f.readline().strip().split(",")
+
+@lru_cache(maxsize=None)
+def leer_datos():
+    datos = []
+    with open(RUTA_DATOS, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)  # Lee el archivo como CSV
+        for fila in reader:
+            datos.append(fila)
+    return datos
+
+# Algoritmo ID3: los ejemplos se codifican una vez en columnas de enteros y
+# el mérito de cada atributo sale de tablas de contingencia (dataset.py, tree.py)
 def ID3(listaAtributos, listaEjemplos):
     if not listaEjemplos:
         return None
-    todos_negativos = all(fila[4] == 'no' for fila in listaEjemplos)
-    todos_positivos = all(fila[4] == 'si' for fila in listaEjemplos)
-    if todos_positivos:
-        return 'SI'
-    if todos_negativos:
-        return 'NO'
-    if not listaAtributos:
-        return None
-    # Seleccionar el mejor atributo (se usa min para elegir el que minimiza la entropía condicional)
-    mejorAtributo = min(listaAtributos, key=lambda attr: merito(attr, listaEjemplos))
-    indice = atributos.index(mejorAtributo)
-    arbol = {mejorAtributo: {}}
-    valoresPosibles = set(ejemplo[indice] for ejemplo in listaEjemplos)
-    for valor in valoresPosibles:
-        ejemplosSubarbol = [ejemplo for ejemplo in listaEjemplos if ejemplo[indice] == valor]
-        atributosRestantes = [attr for attr in listaAtributos if attr != mejorAtributo]
-        arbol[mejorAtributo][valor] = ID3(atributosRestantes, ejemplosSubarbol)
-    return arbol
-
-# Función para clasificar un ejemplo usando el árbol
-def clasificar(arbol, ejemplo):
-    if not isinstance(arbol, dict):
-        return arbol
-    atributo = next(iter(arbol))
-    if atributo not in ejemplo:
-        return f"⚠️ Falta el atributo '{atributo}'"
-    valor = ejemplo[atributo]
-    if valor not in arbol[atributo]:
-        return f"⚠️ Valor '{valor}' no válido para '{atributo}'"
-    return clasificar(arbol[atributo][valor], ejemplo)
+    atributos = leer_atributos()
+    dataset = Dataset.desde_filas(atributos, listaEjemplos)
+    return construir_arbol(dataset, [atributos.index(attr) for attr in listaAtributos])
 
 # ----------------------- Visualización del árbol -----------------------
 
@@ -176,10 +136,17 @@ def dibujar_arbol():
     node_radius = 20
     draw_node(tree_canvas, root_node, node_radius)
 
-# Función para generar el árbol de decisión y dibujarlo, con la consulta
+# Función para generar el árbol de decisión y dibujarlo, con la consulta.
+# El árbol se guarda junto a los datos (Juego.id3) y solo se vuelve a
+# entrenar si cambia el contenido de Juego.txt
 def generar_arbol():
     global arbol_decision
-    arbol_decision = ID3(atributos[:-1], datos)
+
+    def entrenar(ruta, atributos):
+        #los datos han cambiado: la copia de leer_datos ya no vale
+        leer_datos.cache_clear()
+        return ID3(atributos[:-1], leer_datos())
+    arbol_decision = modelo_para(RUTA_DATOS, leer_atributos(), entrenar=entrenar).arbol()
     dibujar_arbol()
     consultar_btn.config(state=tk.NORMAL)
 
@@ -196,6 +163,9 @@ def consultar_arbol():
     # Diccionario para los valores seleccionados por el usuario
     valores_seleccionados = {}
 
+    atributos = leer_atributos()
+    datos = leer_datos()
+
     # Crear un OptionMenu para cada atributo (sin el último atributo)
     for i, atributo in enumerate(atributos[:-1]):  # Excluimos el último atributo
         # Crear una lista de opciones posibles para cada atributo
@@ -228,40 +198,53 @@ def consultar_arbol():
 
 # ----------------------- Interfaz Gráfica Mejorada -----------------------
 
-root = tk.Tk()
-root.title("Árbol de Decisión ID3")
-root.geometry("900x700")
-root.configure(bg="#f0f0f0")
-
-# Frame superior con botones
-top_frame = tk.Frame(root, bg="#f0f0f0")
-top_frame.pack(pady=10)
-
-generar_btn = tk.Button(top_frame, text="Generar Árbol", command=generar_arbol,
-                        bg="#4CAF50", fg="white", font=("Helvetica", 12), padx=10, pady=5)
-generar_btn.pack(side=tk.LEFT, padx=10)
-
-# Se inicia el botón de consulta deshabilitado
-consultar_btn = tk.Button(top_frame, text="Consultar Árbol", command=consultar_arbol,
-                          bg="#2196F3", fg="white", font=("Helvetica", 12), padx=10, pady=5, state=tk.DISABLED)
-consultar_btn.pack(side=tk.LEFT, padx=10)
-
-# Frame para el canvas con scrollbars
-canvas_frame = tk.Frame(root)
-canvas_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-tree_canvas = tk.Canvas(canvas_frame, bg="white")
-tree_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-# Scrollbar vertical
-v_scroll = tk.Scrollbar(canvas_frame, orient=tk.VERTICAL, command=tree_canvas.yview)
-v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-tree_canvas.config(yscrollcommand=v_scroll.set)
-
-# Scrollbar horizontal
-h_scroll = tk.Scrollbar(root, orient=tk.HORIZONTAL, command=tree_canvas.xview)
-h_scroll.pack(fill=tk.X)
-tree_canvas.config(xscrollcommand=h_scroll.set)
-
 arbol_decision = None
-root.mainloop()
+
+def main():
+    global root, consultar_btn, tree_canvas, arbol_decision
+
+    root = tk.Tk()
+    root.title("Árbol de Decisión ID3")
+    root.geometry("900x700")
+    root.configure(bg="#f0f0f0")
+
+    # Frame superior con botones
+    top_frame = tk.Frame(root, bg="#f0f0f0")
+    top_frame.pack(pady=10)
+
+    generar_btn = tk.Button(top_frame, text="Generar Árbol", command=generar_arbol,
+                            bg="#4CAF50", fg="white", font=("Helvetica", 12), padx=10, pady=5)
+    generar_btn.pack(side=tk.LEFT, padx=10)
+
+    # Se inicia el botón de consulta deshabilitado
+    consultar_btn = tk.Button(top_frame, text="Consultar Árbol", command=consultar_arbol,
+                              bg="#2196F3", fg="white", font=("Helvetica", 12), padx=10, pady=5, state=tk.DISABLED)
+    consultar_btn.pack(side=tk.LEFT, padx=10)
+
+    # Frame para el canvas con scrollbars
+    canvas_frame = tk.Frame(root)
+    canvas_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    tree_canvas = tk.Canvas(canvas_frame, bg="white")
+    tree_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    # Scrollbar vertical
+    v_scroll = tk.Scrollbar(canvas_frame, orient=tk.VERTICAL, command=tree_canvas.yview)
+    v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+    tree_canvas.config(yscrollcommand=v_scroll.set)
+
+    # Scrollbar horizontal
+    h_scroll = tk.Scrollbar(root, orient=tk.HORIZONTAL, command=tree_canvas.xview)
+    h_scroll.pack(fill=tk.X)
+    tree_canvas.config(xscrollcommand=h_scroll.set)
+
+    # Si hay un modelo guardado al día se muestra sin entrenar ni leer los datos
+    compilado = modelo_guardado(RUTA_DATOS, leer_atributos())
+    if compilado is not None:
+        arbol_decision = compilado.arbol()
+        dibujar_arbol()
+        consultar_btn.config(state=tk.NORMAL)
+    root.mainloop()
+
+if __name__ == "__main__":
+    main()
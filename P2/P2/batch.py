@@ -0,0 +1,125 @@
+# Clasificación por lotes de un CSV
+#
+# Uso: python P2/P2/batch.py entrada.csv salida.csv [--procesos N | --hilos N]
+# Lee el CSV a trozos de --lote líneas, clasifica cada trozo con el árbol
+# compilado en un pool y escribe cada fila seguida de su clasificación, en
+# el mismo orden. Como mucho hay 2 trozos por worker en vuelo, así que la
+# memoria no depende del tamaño del fichero. Las columnas se asignan con la
+# cabecera de AtributosJuego.txt (la de la clase puede faltar en la entrada).
+# Las líneas se cortan por saltos de línea: no admite campos con saltos de
+# línea entre comillas. El árbol sale del modelo guardado junto a --datos y
+# solo se entrena si los datos han cambiado (model.py).
+
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+from compiled import ArbolCompilado
+from model import modelo_para
+
+LOTE = 100_000
+
+def puntuar_lineas(compilado, atributos, lineas):
+    """Texto CSV con cada línea de lineas y su clasificación al final."""
+    pares = [(linea, fila) for linea, fila in zip(lineas, csv.reader(lineas)) if fila]
+    if not pares:
+        return "", 0
+    ancho = len(pares[0][1])
+    columnas = {atributo: [fila[j] if j < len(fila) else "" for _, fila in pares]
+                for j, atributo in enumerate(atributos[:ancho])}
+    campos = {}  #resultado -> texto ya escapado para CSV
+    salida = []
+    for (linea, _), resultado in zip(pares, compilado.clasificar_lote(columnas)):
+        campo = campos.get(resultado)
+        if campo is None:
+            campo = campos[resultado] = _campo_csv(resultado)
+        salida.append(linea.rstrip("\r\n") + "," + campo + "\n")
+    return "".join(salida), len(pares)
+
+def _campo_csv(valor):
+    texto = io.StringIO()
+    csv.writer(texto, lineterminator="").writerow(["" if valor is None else valor])
+    return texto.getvalue()
+
+# ----------------------- Estado de cada worker -----------------------
+
+_worker = {}
+
+def _init_worker(compilado, atributos):
+    _worker["compilado"], _worker["atributos"] = compilado, atributos
+
+def _worker_puntuar(lineas):
+    return puntuar_lineas(_worker["compilado"], _worker["atributos"], lineas)
+
+# ---------------------------------------------------------------------
+
+def puntuar_csv(arbol, entrada, salida, atributos, lote=LOTE, procesos=None, hilos=None):
+    """
+    Clasifica el CSV entrada y escribe el resultado en salida. arbol puede
+    ser el de diccionarios, un ArbolCompilado o un Bosque (ensemble.py).
+    procesos / hilos: tamaño del pool de procesos o de hilos (con hilos solo
+    se solapa la parte de NumPy). procesos=1 lo hace todo en este proceso.
+    Retorna (filas, segundos).
+    """
+    compilado = arbol if hasattr(arbol, "clasificar_lote") else ArbolCompilado(arbol)
+    t0 = time.perf_counter()
+    total = 0
+    with open(entrada, "r", encoding="utf-8", newline="") as f_in, \
+            open(salida, "w", encoding="utf-8", newline="") as f_out:
+        trozos = iter(lambda: list(islice(f_in, lote)), [])
+        if procesos == 1 and hilos is None:
+            for lineas in trozos:
+                texto, n = puntuar_lineas(compilado, atributos, lineas)
+                f_out.write(texto)
+                total += n
+            return total, time.perf_counter() - t0
+        if hilos is not None:
+            pool = ThreadPoolExecutor(hilos, initializer=_init_worker, initargs=(compilado, atributos))
+            workers = hilos
+        else:
+            pool = ProcessPoolExecutor(procesos, initializer=_init_worker, initargs=(compilado, atributos))
+            workers = procesos or os.cpu_count() or 1
+        with pool:
+            en_vuelo = deque()
+            for lineas in trozos:
+                en_vuelo.append(pool.submit(_worker_puntuar, lineas))
+                if len(en_vuelo) >= 2 * workers:
+                    texto, n = en_vuelo.popleft().result()
+                    f_out.write(texto)
+                    total += n
+            while en_vuelo:
+                texto, n = en_vuelo.popleft().result()
+                f_out.write(texto)
+                total += n
+    return total, time.perf_counter() - t0
+
+def main(argv=None):
+    carpeta = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Clasifica un CSV con el árbol ID3")
+    parser.add_argument("entrada")
+    parser.add_argument("salida")
+    parser.add_argument("--atributos", default=os.path.join(carpeta, "AtributosJuego.txt"))
+    parser.add_argument("--datos", default=os.path.join(carpeta, "Juego.txt"), help="ejemplos para entrenar")
+    parser.add_argument("--modelo", help="modelo guardado (por defecto junto a --datos, ver model.py)")
+    parser.add_argument("--numericos", nargs="*", default=[], help="atributos que se dividen por un umbral")
+    parser.add_argument("--lote", type=int, default=LOTE)
+    pool = parser.add_mutually_exclusive_group()
+    pool.add_argument("--procesos", type=int)
+    pool.add_argument("--hilos", type=int)
+    args = parser.parse_args(argv)
+
+    with open(args.atributos, "r", encoding="utf-8") as f:
+        atributos = f.readline().strip().split(",")
+    compilado = modelo_para(args.datos, atributos, args.modelo, numericos=args.numericos)
+    filas, segundos = puntuar_csv(compilado, args.entrada, args.salida, atributos, args.lote, args.procesos, args.hilos)
+    print(f"{filas} filas en {segundos:.2f} s ({filas / max(segundos, 1e-9):,.0f} filas/s)", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# Mediciones de la construcción del árbol ID3
+#
+# Uso: python P2/P2/bench.py
+# Compara la versión recursiva que copia los índices de cada rama con la
+# iterativa de tree.py (un único array de índices reordenado en el sitio):
+# tiempo, memoria máxima (tracemalloc) y un árbol más profundo que el límite
+# de recursión de Python. Después mide construir_arbol_paralelo y
+# construir_bosque con distinto número de procesos.
+
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from dataset import Dataset, meritos
+from ensemble import Bosque, construir_bosque
+from tree import construir_arbol, construir_arbol_paralelo
+
+# ----------------------- Datos sintéticos -----------------------
+
+def dataset_sintetico(n, n_atributos=8, n_valores=4, n_clases=3, ruido=0.1, seed=0):
+    """
+    Ejemplos aleatorios cuya clase depende de los tres primeros atributos,
+    con una fracción ruido de clases al azar. Se genera ya codificado.
+    """
+    rng = np.random.default_rng(seed)
+    codigos = np.empty((n_atributos + 1, n), dtype=np.int32)
+    codigos[:-1] = rng.integers(0, n_valores, (n_atributos, n))
+    clase = (codigos[0] + codigos[1] * (codigos[2] % 2)) % n_clases
+    al_azar = rng.random(n) < ruido
+    clase[al_azar] = rng.integers(0, n_clases, int(al_azar.sum()))
+    codigos[-1] = clase
+    atributos = [f"a{j}" for j in range(n_atributos)] + ["clase"]
+    valores = [[f"v{c}" for c in range(n_valores)] for _ in range(n_atributos)]
+    valores.append([f"c{c}" for c in range(n_clases)])
+    return Dataset(atributos, codigos, valores)
+
+def dataset_cadena(profundidad):
+    """
+    Cada ejemplo i < profundidad solo tiene a 1 el atributo i y es de clase
+    'si'; el último no tiene ningún 1 y es 'no'. El árbol es una cadena que
+    separa un ejemplo por nivel.
+    """
+    codigos = np.zeros((profundidad + 1, profundidad + 1), dtype=np.int32)
+    codigos[np.arange(profundidad), np.arange(profundidad)] = 1
+    codigos[-1, :profundidad] = 1
+    atributos = [f"a{j}" for j in range(profundidad)] + ["clase"]
+    valores = [["0", "1"] for _ in range(profundidad)] + [["no", "si"]]
+    return Dataset(atributos, codigos, valores)
+
+# ----------------------- Versión anterior -----------------------
+
+def construir_recursivo(dataset, candidatos=None, filas=None):
+    #como tree.construir_arbol antes de hacerlo iterativo: una copia de los
+    #índices y de la lista de atributos restantes por rama
+    if candidatos is None:
+        candidatos = list(range(len(dataset.atributos) - 1))
+    if filas is None:
+        filas = np.arange(dataset.n)
+    if len(filas) == 0:
+        return None
+    clase = dataset.clase[filas]
+    if (clase == clase[0]).all():
+        return dataset.etiqueta(clase[0])
+    if not candidatos:
+        return None
+    mejor = candidatos[int(np.argmin(np.round(meritos(dataset, filas, candidatos), 12)))]
+    columna = dataset.codigos[mejor, filas]
+    nombre = dataset.atributos[mejor]
+    arbol = {nombre: {}}
+    restantes = [a for a in candidatos if a != mejor]
+    for valor in np.unique(columna):
+        arbol[nombre][dataset.valores[mejor][valor]] = construir_recursivo(dataset, restantes, filas[columna == valor])
+    return arbol
+
+# ----------------------- Mediciones -----------------------
+
+def medir(construir, dataset):
+    """(árbol, segundos, bytes de memoria máxima); árbol es None si falla."""
+    t0 = time.perf_counter()
+    try:
+        construir(dataset)
+    except RecursionError:
+        return None, time.perf_counter() - t0, None
+    segundos = time.perf_counter() - t0
+    tracemalloc.start()
+    arbol = construir(dataset)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return arbol, segundos, pico
+
+def comparar(tamanos=(100_000, 1_000_000), n_atributos=(8, 40), profundidad=1100):
+    filas = []
+    casos = [(f"{n} x {a}", dataset_sintetico(n, a)) for n in tamanos for a in n_atributos]
+    casos.append((f"cadena {profundidad}", dataset_cadena(profundidad)))
+    for nombre, dataset in casos:
+        anterior, t_anterior, m_anterior = medir(construir_recursivo, dataset)
+        nuevo, t_nuevo, m_nuevo = medir(construir_arbol, dataset)
+        igual = "-" if anterior is None else anterior == nuevo
+        filas.append((nombre, igual, t_anterior, m_anterior, t_nuevo, m_nuevo))
+    return filas
+
+def imprimir(filas):
+    print(f"{'datos':>16} {'igual':>6} {'recursivo s':>12} {'MiB':>8} {'iterativo s':>12} {'MiB':>8}")
+    mib = lambda b: "RecursionError" if b is None else f"{b / 2**20:8.1f}"
+    for nombre, igual, t_anterior, m_anterior, t_nuevo, m_nuevo in filas:
+        print(f"{nombre:>16} {str(igual):>6} {t_anterior:12.2f} {mib(m_anterior):>8} {t_nuevo:12.2f} {mib(m_nuevo):>8}")
+
+def comparar_paralelo(n=1_000_000, n_atributos=20, procesos=(1, 2, 4, 8), umbral=50_000):
+    dataset = dataset_sintetico(n, n_atributos)
+    t0 = time.perf_counter()
+    serie = construir_arbol(dataset)
+    base = time.perf_counter() - t0
+    filas = []
+    for p in procesos:
+        t0 = time.perf_counter()
+        arbol = construir_arbol_paralelo(dataset, processes=p, umbral=umbral)
+        segundos = time.perf_counter() - t0
+        filas.append((p, arbol == serie, segundos, base / segundos))
+    return filas
+
+def comparar_bosque(n=200_000, n_arboles=16, procesos=(1, 2, 4, 8), subespacio=5, n_prueba=100_000):
+    """
+    Por número de procesos: segundos en total, segundos medios por árbol,
+    árboles por segundo, filas por segundo al clasificar por votación y
+    acierto en ejemplos de prueba.
+    """
+    dataset = dataset_sintetico(n, 10)
+    prueba = dataset_sintetico(n_prueba, 10, seed=1)
+    columnas = {a: np.array(v, dtype=str)[c] for a, v, c in zip(prueba.atributos, prueba.valores, prueba.codigos)}
+    esperado = np.array([prueba.etiqueta(c) for c in range(len(prueba.clases))])[prueba.clase]
+    filas = []
+    for p in procesos:
+        t0 = time.perf_counter()
+        arboles, tiempos = construir_bosque(dataset, n_arboles, subespacio=subespacio, processes=p)
+        segundos = time.perf_counter() - t0
+        bosque = Bosque(arboles)
+        t0 = time.perf_counter()
+        resultados = bosque.clasificar_lote(columnas)
+        puntuar = time.perf_counter() - t0
+        filas.append((p, segundos, sum(tiempos) / len(tiempos), n_arboles / segundos, n_prueba / puntuar,
+                      float((resultados == esperado).mean())))
+    return filas
+
+if __name__ == "__main__":
+    print(f"Límite de recursión: {sys.getrecursionlimit()}")
+    imprimir(comparar())
+    print()
+    print(f"CPUs: {os.cpu_count()}")
+    print(f"{'procesos':>8} {'igual':>6} {'segundos':>9} {'speedup':>8}")
+    for p, igual, segundos, speedup in comparar_paralelo():
+        print(f"{p:>8} {str(igual):>6} {segundos:9.2f} {speedup:8.2f}")
+    print()
+    print(f"{'procesos':>8} {'segundos':>9} {'s/árbol':>8} {'árboles/s':>10} {'filas/s voto':>13} {'acierto':>8}")
+    for p, segundos, por_arbol, arboles, filas, acierto in comparar_bosque():
+        print(f"{p:>8} {segundos:9.2f} {por_arbol:8.2f} {arboles:10.2f} {filas:13,.0f} {acierto:8.1%}")
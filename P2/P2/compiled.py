@@ -0,0 +1,208 @@
+# Árbol compilado para clasificar lotes
+#
+# Pasa el árbol de diccionarios anidados a arrays planos: para cada nodo, el
+# atributo que pregunta (-1 en las hojas), su etiqueta si es hoja y, si no,
+# dónde empiezan sus hijos en un array destino indexado por el código del
+# valor. Los valores de cada atributo se codifican con el vocabulario de las
+# ramas del propio árbol, así que no hace falta el Dataset de entrenamiento.
+# En un atributo numérico el vocabulario son sus umbrales, ordenados, y el
+# código de un valor es el número de umbrales menores que él: en un nodo con
+# el umbral b, los códigos 0..b van a '<=' y el resto a '>'.
+# Un lote entero baja un nivel del árbol por iteración con operaciones de NumPy.
+
+import numpy as np
+
+from dataset import MAYOR, MENOR, umbral_de
+
+# códigos especiales de predecir
+FALTA_ATRIBUTO = -1
+VALOR_NO_VALIDO = -2
+
+class ArbolCompilado:
+    """
+    Uso:
+        compilado = ArbolCompilado(arbol)
+        resultados = compilado.clasificar_lote({"TiempoExterior": [...], ...})
+    resultados[i] es lo mismo que clasificar(arbol, ejemplo_i), avisos incluidos.
+    """
+
+    def __init__(self, arbol):
+        self.atributos = []    #atributos que aparecen en el árbol
+        self.etiquetas = []    #hojas distintas ('SI', 'NO', None...)
+        vocabulario = {}       #atributo -> valores de sus ramas (o umbrales)
+        numerico = {}          #atributo -> si se divide por umbrales
+        pendientes = [arbol]
+        while pendientes:
+            nodo = pendientes.pop()
+            if isinstance(nodo, dict):
+                atributo = next(iter(nodo))
+                umbral = umbral_de(nodo[atributo])
+                if atributo not in vocabulario:
+                    self.atributos.append(atributo)
+                    vocabulario[atributo] = set()
+                    numerico[atributo] = umbral is not None
+                elif numerico[atributo] != (umbral is not None):
+                    raise ValueError(f"El atributo '{atributo}' se usa como numérico y como categórico")
+                vocabulario[atributo].update(nodo[atributo] if umbral is None else [umbral])
+                pendientes.extend(nodo[atributo].values())
+            elif nodo not in self.etiquetas:
+                self.etiquetas.append(nodo)
+        self.numericos = [numerico[a] for a in self.atributos]
+        self.vocabulario = [np.array(sorted(vocabulario[a], key=float if numerico[a] else None), dtype=str)
+                            for a in self.atributos]
+        self._umbrales()
+
+        #numeración por niveles: el nodo k es nodos[k] y la raíz es el 0
+        nodos = [arbol]
+        atributo, hoja, base, destino = [], [], [], []
+        for nodo in nodos:  #nodos crece mientras se recorre
+            if not isinstance(nodo, dict):
+                atributo.append(-1)
+                hoja.append(self.etiquetas.index(nodo))
+                base.append(0)
+                continue
+            nombre = next(iter(nodo))
+            f = self.atributos.index(nombre)
+            atributo.append(f)
+            hoja.append(-1)
+            base.append(len(destino))
+            if self.numericos[f]:
+                umbral = umbral_de(nodo[nombre])
+                b = int(np.searchsorted(self.umbrales[f], float(umbral)))
+                m = len(self.umbrales[f])
+                destino.extend([len(nodos)] * (b + 1) + [len(nodos) + 1] * (m - b))
+                nodos.extend((nodo[nombre][MENOR + umbral], nodo[nombre][MAYOR + umbral]))
+                continue
+            fila = [-1] * len(self.vocabulario[f])
+            for valor, hijo in nodo[nombre].items():
+                fila[int(np.searchsorted(self.vocabulario[f], valor))] = len(nodos)
+                nodos.append(hijo)
+            destino.extend(fila)
+        self.atributo = np.array(atributo, dtype=np.int32)
+        self.hoja = np.array(hoja, dtype=np.int32)
+        self.base = np.array(base, dtype=np.int64)
+        self.destino = np.array(destino, dtype=np.int64)
+
+    def _umbrales(self):
+        #umbrales como números de los atributos numéricos (None en los demás)
+        self.umbrales = [vocab.astype(np.float64) if numerico else None
+                         for vocab, numerico in zip(self.vocabulario, self.numericos)]
+
+    @classmethod
+    def desde_arrays(cls, atributos, vocabulario, etiquetas, atributo, hoja, base, destino, numericos=None):
+        """Reconstruye un ArbolCompilado con arrays ya hechos (ver model.py)."""
+        compilado = cls.__new__(cls)
+        compilado.atributos = list(atributos)
+        compilado.vocabulario = [np.array(vocab, dtype=str) for vocab in vocabulario]
+        compilado.numericos = list(numericos) if numericos is not None else [False] * len(compilado.atributos)
+        compilado.etiquetas = list(etiquetas)
+        compilado.atributo, compilado.hoja = atributo, hoja
+        compilado.base, compilado.destino = base, destino
+        compilado._umbrales()
+        return compilado
+
+    def arbol(self):
+        """El árbol de diccionarios anidados, para clasificar y la vista de Tk."""
+        raiz = {}
+        pendientes = [(raiz, None, 0)]
+        while pendientes:
+            padre, clave, k = pendientes.pop()
+            f = int(self.atributo[k])
+            if f < 0:
+                padre[clave] = self.etiquetas[self.hoja[k]]
+                continue
+            hijos = {}
+            padre[clave] = {self.atributos[f]: hijos}
+            vocab = self.vocabulario[f]
+            base = int(self.base[k])
+            if self.numericos[f]:
+                fila = self.destino[base:base + len(vocab) + 1]
+                umbral = str(vocab[int((fila == fila[0]).sum()) - 1])
+                hijos[MENOR + umbral] = hijos[MAYOR + umbral] = None  #fija el orden de las ramas
+                pendientes.append((hijos, MAYOR + umbral, int(fila[-1])))
+                pendientes.append((hijos, MENOR + umbral, int(fila[0])))
+                continue
+            for codigo, hijo in enumerate(self.destino[base:base + len(vocab)].tolist()):
+                if hijo >= 0:
+                    hijos[str(vocab[codigo])] = None  #fija el orden de las ramas
+                    pendientes.append((hijos, str(vocab[codigo]), hijo))
+        return raiz[None]
+
+    def codificar(self, columnas, n):
+        """
+        Matriz int32 (atributos del árbol x n ejemplos) a partir de un dict
+        atributo -> secuencia de textos: VALOR_NO_VALIDO si el valor no sale
+        en el árbol y FALTA_ATRIBUTO en toda la fila si falta el atributo.
+        Los atributos numéricos se codifican por sus umbrales (VALOR_NO_VALIDO
+        si el texto no es un número).
+        """
+        codigos = np.full((len(self.atributos), n), FALTA_ATRIBUTO, dtype=np.int32)
+        for f, (atributo, vocab) in enumerate(zip(self.atributos, self.vocabulario)):
+            if atributo not in columnas:
+                continue
+            valores = np.asarray(columnas[atributo], dtype=str)
+            if self.numericos[f]:
+                numeros, validos = _numeros(valores)
+                codigos[f] = np.where(validos, np.searchsorted(self.umbrales[f], numeros), VALOR_NO_VALIDO)
+                continue
+            pos = np.minimum(np.searchsorted(vocab, valores), len(vocab) - 1)
+            codigos[f] = np.where(vocab[pos] == valores, pos, VALOR_NO_VALIDO)
+        return codigos
+
+    def predecir(self, codigos):
+        """
+        Retorna (resultado, nodo) para una matriz de codificar: resultado es
+        el índice en etiquetas, FALTA_ATRIBUTO o VALOR_NO_VALIDO, y nodo el
+        nodo donde se paró cada ejemplo.
+        """
+        n = codigos.shape[1]
+        nodo = np.zeros(n, dtype=np.int64)
+        resultado = np.empty(n, dtype=np.int32)
+        activos = np.arange(n)
+        while len(activos):
+            actual = nodo[activos]
+            f = self.atributo[actual]
+            es_hoja = f < 0
+            resultado[activos[es_hoja]] = self.hoja[actual[es_hoja]]
+            activos, actual, f = activos[~es_hoja], actual[~es_hoja], f[~es_hoja]
+            codigo = codigos[f, activos]
+            siguiente = np.where(codigo >= 0, self.destino[self.base[actual] + np.maximum(codigo, 0)], -1)
+            #un valor conocido puede no tener rama en este nodo
+            codigo[(codigo >= 0) & (siguiente < 0)] = VALOR_NO_VALIDO
+            para = codigo < 0
+            resultado[activos[para]] = codigo[para]
+            nodo[activos[~para]] = siguiente[~para]
+            activos = activos[~para]
+        return resultado, nodo
+
+    def clasificar_lote(self, columnas):
+        """Array de objetos con el resultado de clasificar para cada ejemplo."""
+        n = len(next(iter(columnas.values()))) if columnas else 0
+        resultado, nodo = self.predecir(self.codificar(columnas, n))
+        etiquetas = np.empty(len(self.etiquetas), dtype=object)
+        etiquetas[:] = self.etiquetas
+        salida = etiquetas[np.maximum(resultado, 0)]
+        #avisos con el mismo texto que clasificar (solo para esas filas)
+        for i in np.flatnonzero(resultado < 0):
+            atributo = self.atributos[self.atributo[nodo[i]]]
+            if resultado[i] == FALTA_ATRIBUTO:
+                salida[i] = f"⚠️ Falta el atributo '{atributo}'"
+            else:
+                salida[i] = f"⚠️ Valor '{columnas[atributo][i]}' no válido para '{atributo}'"
+        return salida
+
+def _numeros(textos):
+    #(array float64, máscara de los textos que son números)
+    try:
+        return textos.astype(np.float64), np.ones(len(textos), dtype=bool)
+    except ValueError:
+        pass
+    numeros = np.zeros(len(textos))
+    validos = np.zeros(len(textos), dtype=bool)
+    for i, texto in enumerate(textos.tolist()):
+        try:
+            numeros[i] = float(texto)
+            validos[i] = True
+        except ValueError:
+            pass
+    return numeros, validos
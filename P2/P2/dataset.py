@@ -0,0 +1,169 @@
+# Conjunto de ejemplos codificado por columnas
+#
+# Cada atributo (y la clase, que es la última columna) se codifica una sola vez
+# como enteros 0..k-1, en el orden alfabético de sus valores; los atributos
+# numéricos, en el orden de su valor como número. Las cuentas que necesita
+# ID3 salen de tablas de contingencia (valor, clase) calculadas con
+# np.bincount, sin copiar listas de ejemplos.
+
+import csv
+
+import numpy as np
+
+class Dataset:
+    """
+    atributos: nombres de las columnas; el último es la clase.
+    codigos: array int32 (n_atributos, n_ejemplos); codigos[j] es la columna j.
+    valores: valores[j][c] es el texto del código c en la columna j.
+    numericos: índices de las columnas numéricas, ordenados.
+    """
+
+    def __init__(self, atributos, codigos, valores, numericos=()):
+        self.atributos = list(atributos)
+        self.codigos = codigos
+        self.valores = valores
+        self.numericos = tuple(sorted(numericos))
+
+    @classmethod
+    def desde_filas(cls, atributos, filas, numericos=()):
+        """
+        Codifica una lista de filas (listas de textos), como la de csv.reader.
+        numericos: nombres de los atributos que se dividen por un umbral.
+        """
+        tabla = np.array(filas, dtype=str)
+        if tabla.size == 0:
+            tabla = tabla.reshape(0, len(atributos))
+        if tabla.ndim != 2 or tabla.shape[1] != len(atributos):
+            raise ValueError(f"Las filas deben tener {len(atributos)} columnas")
+        columnas = [atributos.index(nombre) for nombre in numericos]
+        codigos = np.empty((len(atributos), len(tabla)), dtype=np.int32)
+        valores = []
+        for j in range(len(atributos)):
+            if j not in columnas:
+                unicos, codigos[j] = np.unique(tabla[:, j], return_inverse=True)
+                valores.append(unicos.tolist())
+                continue
+            try:
+                numeros = tabla[:, j].astype(np.float64)
+            except ValueError:
+                raise ValueError(f"El atributo '{atributos[j]}' no es numérico") from None
+            #el texto de cada código es el de su primera aparición
+            _, primera, codigos[j] = np.unique(numeros, return_index=True, return_inverse=True)
+            valores.append(tabla[primera, j].tolist())
+        return cls(atributos, codigos, valores, columnas)
+
+    @classmethod
+    def leer_csv(cls, ruta, atributos, numericos=()):
+        with open(ruta, "r", encoding="utf-8") as f:
+            filas = [fila for fila in csv.reader(f) if fila]
+        return cls.desde_filas(atributos, filas, numericos)
+
+    @property
+    def n(self):
+        return self.codigos.shape[1]
+
+    @property
+    def clase(self):
+        return self.codigos[-1]
+
+    @property
+    def clases(self):
+        return self.valores[-1]
+
+    def etiqueta(self, codigo):
+        #las hojas del árbol llevan la clase en mayúsculas ('SI', 'NO')
+        return self.clases[codigo].upper()
+
+    def orden_inicial(self, filas=None):
+        """
+        Array int64 (1 + numéricos, ejemplos): la fila 0 son los índices de
+        filas (por defecto todos) y la fila 1 + i, los mismos ordenados por
+        el valor del atributo numericos[i]. Es la única vez que se ordena.
+        """
+        filas = np.arange(self.n) if filas is None else np.asarray(filas, dtype=np.int64)
+        orden = np.empty((1 + len(self.numericos), len(filas)), dtype=np.int64)
+        orden[0] = filas
+        for i, a in enumerate(self.numericos):
+            orden[1 + i] = filas[np.argsort(self.codigos[a, filas], kind="stable")]
+        return orden
+
+# Ramas de una división numérica: '<=umbral' y '>umbral', con el umbral tal
+# como aparece en los datos
+MENOR = "<="
+MAYOR = ">"
+
+def umbral_de(ramas):
+    """Texto del umbral si ramas (dict valor -> subárbol) es una división numérica; si no, None."""
+    if len(ramas) != 2:
+        return None
+    menor, mayor = ramas
+    if not menor.startswith(MENOR) or mayor != MAYOR + menor[len(MENOR):]:
+        return None
+    umbral = menor[len(MENOR):]
+    try:
+        float(umbral)
+    except ValueError:
+        return None
+    return umbral
+
+# Fórmula de información o entropía, a partir de las cuentas de cada clase
+# (en el último eje; vale para una tabla entera de una vez)
+def infor(conteos):
+    conteos = np.asarray(conteos, dtype=np.float64)
+    total = conteos.sum(axis=-1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = conteos / total
+        terminos = np.where(p > 0, p * np.log2(p), 0.0)
+    return -terminos.sum(axis=-1)
+
+# elementos de la matriz de claves que meritos construye de una vez (8 MiB)
+BLOQUE = 1 << 20
+
+# Fórmula del mérito: entropía condicional de la clase sabiendo el atributo,
+# para todos los candidatos con un np.bincount por bloque de atributos
+def meritos(dataset, filas, candidatos):
+    k = len(dataset.clases)
+    candidatos = np.asarray(candidatos)
+    n_valores = np.array([len(dataset.valores[a]) for a in candidatos])
+    inicio_valor = np.concatenate(([0], np.cumsum(n_valores)[:-1]))
+    clase = dataset.clase[filas]
+    tabla = np.zeros(int(n_valores.sum()) * k, dtype=np.int64)
+    paso = max(1, BLOQUE // max(1, len(filas)))
+    for b in range(0, len(candidatos), paso):
+        bloque = slice(b, b + paso)
+        claves = dataset.codigos[np.ix_(candidatos[bloque], filas)].astype(np.int64)
+        claves += inicio_valor[bloque, None]
+        claves *= k
+        claves += clase
+        tabla += np.bincount(claves.ravel(), minlength=len(tabla))
+    return meritos_tabla(tabla.reshape(-1, k), inicio_valor, len(filas))
+
+def meritos_tabla(tabla, inicio_valor, n):
+    """
+    Mérito de cada atributo a partir de su tabla de contingencia: tabla tiene
+    una fila por valor (los de cada atributo seguidos, empezando en
+    inicio_valor) y una columna por clase; n es el número de ejemplos.
+    """
+    por_valor = tabla.sum(axis=1)
+    ponderada = por_valor * infor(tabla)
+    return np.add.reduceat(ponderada, inicio_valor) / n
+
+# Mejor umbral de un atributo numérico: filas ya vienen ordenadas por su
+# valor, así que basta un recorrido con las cuentas acumuladas de cada clase
+# (O(n), sin ordenar). Se puede cortar entre dos valores distintos; retorna
+# (mérito, código del mayor valor de la izquierda), o (inf, None) si todos
+# los ejemplos tienen el mismo valor.
+def mejor_umbral(dataset, filas, atributo):
+    codigos = dataset.codigos[atributo, filas]
+    cortes = np.flatnonzero(codigos[:-1] != codigos[1:])
+    if len(cortes) == 0:
+        return np.inf, None
+    clase = dataset.clase[filas]
+    izquierda = np.empty((len(cortes), len(dataset.clases)), dtype=np.int64)
+    for c in range(len(dataset.clases)):
+        izquierda[:, c] = np.cumsum(clase == c)[cortes]
+    derecha = np.bincount(clase, minlength=len(dataset.clases)) - izquierda
+    n_izquierda = cortes + 1
+    merito = (n_izquierda * infor(izquierda) + (len(filas) - n_izquierda) * infor(derecha)) / len(filas)
+    mejor = int(np.argmin(np.round(merito, 12)))
+    return float(merito[mejor]), int(codigos[cortes[mejor]])
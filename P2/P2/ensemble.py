@@ -0,0 +1,96 @@
+# Conjunto de árboles ID3 (bagging y subespacios aleatorios)
+#
+# construir_bosque entrena n_arboles árboles con construir_arbol, cada uno
+# con una muestra bootstrap de los ejemplos y, si se pide, un subconjunto al
+# azar de los atributos. Los árboles se reparten entre un pool de procesos
+# que leen el mismo Dataset en memoria compartida (shared.py): cada tarea
+# solo lleva su semilla y devuelve su árbol. Las hojas sin atributos que
+# separen las clases llevan la clase más frecuente, no None, para que voten.
+# Bosque compila los árboles y clasifica lotes por votación.
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from compiled import ArbolCompilado
+from shared import SharedDataset, init_worker, worker_dataset
+from tree import construir_arbol
+
+def construir_bosque(dataset, n_arboles=16, bootstrap=True, subespacio=None, candidatos=None,
+                     processes=None, seed=0):
+    """
+    subespacio: atributos por árbol (por defecto todos los candidatos).
+    processes=1 no crea pool. Retorna (árboles, segundos de cada árbol);
+    con la misma seed salen los mismos árboles sea cual sea processes.
+    """
+    if candidatos is None:
+        candidatos = range(len(dataset.atributos) - 1)
+    tarea = (tuple(candidatos), bootstrap, subespacio)
+    semillas = np.random.SeedSequence(seed).spawn(n_arboles)
+    if processes == 1:
+        resultados = [_arbol(dataset, semilla, *tarea) for semilla in semillas]
+    else:
+        with SharedDataset(dataset) as shared, \
+                ProcessPoolExecutor(processes, initializer=init_worker, initargs=(shared.handle,)) as pool:
+            resultados = list(pool.map(_worker_arbol, semillas, [tarea] * n_arboles))
+    return [arbol for arbol, _ in resultados], [segundos for _, segundos in resultados]
+
+def _arbol(dataset, semilla, candidatos, bootstrap, subespacio):
+    #un árbol del bosque y lo que ha tardado en construirse
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(semilla)
+    filas = rng.integers(0, dataset.n, dataset.n) if bootstrap else None
+    if subespacio is not None and subespacio < len(candidatos):
+        candidatos = tuple(sorted(rng.choice(candidatos, subespacio, replace=False).tolist()))
+    arbol = construir_arbol(dataset, candidatos, filas, mayoritaria=True)
+    return arbol, time.perf_counter() - t0
+
+def _worker_arbol(semilla, tarea):
+    dataset, _ = worker_dataset()
+    return _arbol(dataset, semilla, *tarea)
+
+class Bosque:
+    """
+    Uso:
+        bosque = Bosque(arboles)
+        resultados = bosque.clasificar_lote({"TiempoExterior": [...], ...})
+    Cada árbol vota la etiqueta de su hoja; los avisos y las hojas None no
+    votan. En un empate gana la primera etiqueta en orden alfabético. Si
+    ningún árbol vota un ejemplo, su resultado es el del primer árbol.
+    """
+
+    def __init__(self, arboles):
+        self.compilados = [arbol if isinstance(arbol, ArbolCompilado) else ArbolCompilado(arbol)
+                           for arbol in arboles]
+        self.etiquetas = sorted({e for c in self.compilados for e in c.etiquetas if e is not None})
+        #por árbol: índice de cada una de sus etiquetas en self.etiquetas (-1 para None)
+        self._mapas = [np.array([self.etiquetas.index(e) if e is not None else -1 for e in c.etiquetas] + [-1],
+                                dtype=np.int64) for c in self.compilados]
+
+    def votos(self, columnas, n):
+        """Matriz (n, etiquetas) con los votos de cada ejemplo."""
+        k = len(self.etiquetas)
+        votos = np.zeros(n * k, dtype=np.int64)
+        for compilado, mapa in zip(self.compilados, self._mapas):
+            resultado, _ = compilado.predecir(compilado.codificar(columnas, n))
+            voto = mapa[np.where(resultado >= 0, resultado, -1)]  #avisos -> -1 (último de mapa)
+            validos = np.flatnonzero(voto >= 0)
+            votos += np.bincount(validos * k + voto[validos], minlength=n * k)
+        return votos.reshape(n, k)
+
+    def clasificar_lote(self, columnas):
+        """Array de objetos con la etiqueta más votada de cada ejemplo."""
+        n = len(next(iter(columnas.values()))) if columnas else 0
+        votos = self.votos(columnas, n)
+        etiquetas = np.empty(len(self.etiquetas), dtype=object)
+        etiquetas[:] = self.etiquetas
+        salida = np.empty(n, dtype=object)
+        con_votos = votos.sum(axis=1) > 0
+        if len(self.etiquetas):  #sin etiquetas no vota nadie
+            salida[con_votos] = etiquetas[votos[con_votos].argmax(axis=1)]
+        sin_votos = np.flatnonzero(~con_votos)
+        if len(sin_votos):
+            resto = {atributo: np.asarray(valores, dtype=str)[sin_votos] for atributo, valores in columnas.items()}
+            salida[sin_votos] = self.compilados[0].clasificar_lote(resto)
+        return salida
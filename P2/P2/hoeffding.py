@@ -0,0 +1,130 @@
+# Árbol de Hoeffding (VFDT) para ejemplos que llegan de uno en uno
+#
+# En vez de volver a ejecutar ID3 con todo el histórico, cada ejemplo nuevo
+# baja por el árbol hasta su hoja (O(profundidad)) y suma 1 en las cuentas
+# (valor, clase) de esa hoja para cada atributo candidato. Cada n_min
+# ejemplos una hoja compara los méritos de sus candidatos (la misma entropía
+# condicional que construir_arbol, con meritos_tabla) y se divide por el
+# mejor cuando la cota de Hoeffding asegura, con probabilidad 1 - delta, que
+# es mejor que no dividir y que el segundo atributo; si esos dos están a menos
+# de tau se considera un empate y también se divide. Las hojas nuevas heredan
+# las cuentas de clase del padre solo para su etiqueta: los méritos y la cota
+# usan únicamente los ejemplos que la hoja ha visto. Los valores y las clases no se
+# conocen de antemano: se añaden según aparecen. arbol() da el árbol de
+# diccionarios anidados, así que sirven clasificar y la vista de Tk.
+
+import math
+
+import numpy as np
+
+from dataset import infor, meritos_tabla
+
+class _Nodo:
+    __slots__ = ("atributo", "hijos", "clases", "heredadas", "n", "cuentas", "candidatos", "pendientes")
+
+    def __init__(self, candidatos, heredadas=None):
+        self.atributo = None               #índice del atributo si ya se dividió
+        self.hijos = {}                    #valor -> _Nodo
+        self.clases = {}                   #clase -> ejemplos vistos en la hoja
+        self.heredadas = dict(heredadas or {})  #cuentas del padre, solo para la etiqueta
+        self.n = 0                         #ejemplos vistos en la hoja (los de cuentas)
+        self.candidatos = candidatos
+        self.cuentas = [{} for _ in candidatos]  #por candidato: valor -> {clase: n}
+        self.pendientes = 0                #ejemplos desde la última revisión
+
+class ArbolHoeffding:
+    """
+    Uso:
+        hoeffding = ArbolHoeffding(atributos)
+        for fila in filas:          #listas de textos, la clase al final
+            hoeffding.aprender(fila)
+        clasificar(hoeffding.arbol(), ejemplo)
+    delta: probabilidad de elegir mal un atributo; tau: margen de empate;
+    n_min: ejemplos que recibe una hoja entre dos revisiones.
+    """
+
+    def __init__(self, atributos, candidatos=None, delta=1e-7, tau=0.05, n_min=200):
+        self.atributos = list(atributos)
+        if candidatos is None:
+            candidatos = range(len(self.atributos) - 1)
+        self.delta, self.tau, self.n_min = delta, tau, n_min
+        self.raiz = _Nodo(tuple(candidatos))
+        self.n = 0
+
+    def aprender(self, fila):
+        if len(fila) != len(self.atributos):
+            raise ValueError(f"Las filas deben tener {len(self.atributos)} columnas")
+        clase = fila[-1]
+        nodo = self.raiz
+        while nodo.atributo is not None:
+            valor = fila[nodo.atributo]
+            hijo = nodo.hijos.get(valor)
+            if hijo is None:  #valor nuevo en un nodo ya dividido: hoja nueva
+                hijo = nodo.hijos[valor] = _Nodo(tuple(a for a in nodo.candidatos if a != nodo.atributo))
+            nodo = hijo
+        nodo.clases[clase] = nodo.clases.get(clase, 0) + 1
+        nodo.n += 1
+        for a, cuentas in zip(nodo.candidatos, nodo.cuentas):
+            por_clase = cuentas.setdefault(fila[a], {})
+            por_clase[clase] = por_clase.get(clase, 0) + 1
+        self.n += 1
+        nodo.pendientes += 1
+        if nodo.pendientes >= self.n_min:
+            nodo.pendientes = 0
+            self._revisar(nodo)
+
+    def aprender_filas(self, filas):
+        for fila in filas:
+            if fila:
+                self.aprender(fila)
+
+    def _revisar(self, hoja):
+        #divide la hoja si la cota de Hoeffding lo justifica
+        if len(hoja.clases) < 2 or not hoja.candidatos:
+            return
+        clases = sorted(hoja.clases)
+        n = hoja.n  #solo los ejemplos que hay detrás de cuentas
+        bloques = [[[por_clase.get(c, 0) for c in clases] for _, por_clase in sorted(cuentas.items())]
+                   for cuentas in hoja.cuentas]
+        inicio = np.concatenate(([0], np.cumsum([len(b) for b in bloques])[:-1]))
+        merito = np.round(meritos_tabla(np.array([f for b in bloques for f in b]), inicio, n), 12)
+        #no dividir tiene como mérito la entropía de la hoja
+        sin_dividir = round(float(infor([hoja.clases[c] for c in clases])), 12)
+        orden = np.argsort(merito, kind="stable")
+        mejor = float(merito[orden[0]])
+        segundo = float(merito[orden[1]]) if len(orden) > 1 else sin_dividir
+        rango = math.log2(len(clases))
+        epsilon = math.sqrt(rango * rango * math.log(1 / self.delta) / (2 * n))
+        #el empate con tau solo decide entre atributos que ya ganan a no dividir
+        if sin_dividir - mejor > epsilon and (segundo - mejor > epsilon or epsilon < self.tau):
+            self._dividir(hoja, int(orden[0]))
+
+    def _dividir(self, hoja, i):
+        hoja.atributo = hoja.candidatos[i]
+        restantes = tuple(a for a in hoja.candidatos if a != hoja.atributo)
+        for valor, por_clase in hoja.cuentas[i].items():
+            hoja.hijos[valor] = _Nodo(restantes, por_clase)  #la hoja nueva ya sabe su clase
+        hoja.cuentas = hoja.clases = hoja.heredadas = None
+
+    def arbol(self):
+        """Árbol de diccionarios anidados, como el de construir_arbol."""
+        raiz = {}
+        pendientes = [(raiz, None, self.raiz)]
+        while pendientes:
+            padre, clave, nodo = pendientes.pop()
+            if nodo.atributo is None:
+                padre[clave] = _etiqueta({c: nodo.clases.get(c, 0) + nodo.heredadas.get(c, 0)
+                                          for c in nodo.clases.keys() | nodo.heredadas.keys()})
+                continue
+            hijos = {}
+            padre[clave] = {self.atributos[nodo.atributo]: hijos}
+            for valor in sorted(nodo.hijos):
+                hijos[valor] = None  #fija el orden de las ramas
+                pendientes.append((hijos, valor, nodo.hijos[valor]))
+        return raiz[None]
+
+def _etiqueta(clases):
+    #clase mayoritaria de la hoja en mayúsculas (None si no hay ejemplos)
+    if not clases:
+        return None
+    return max(sorted(clases), key=clases.get).upper()
@@ -0,0 +1,160 @@
+# Modelos ID3 guardados en disco
+#
+# Un fichero .id3 guarda un ArbolCompilado:
+#     MAGIC, versión (uint16) y longitud de los metadatos (uint32)
+#     metadatos en JSON: atributos, vocabulario, etiquetas, de qué fichero de
+#     datos sale el modelo (tamaño, fecha y sha256) y con qué configuración
+#     (columnas y atributos numéricos), y dónde está cada array
+#     los arrays del árbol, alineados a 8 bytes
+# Al cargarlo los arrays se mapean en memoria, sin leerlos. modelo_para solo
+# vuelve a entrenar si cambia el contenido del fichero de datos o la
+# configuración; si solo cambia la fecha se comprueba el sha256 y se reutiliza.
+
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from compiled import ArbolCompilado
+
+MAGIC = b"ID3M"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHI")
+ARRAYS = ("atributo", "hoja", "base", "destino")
+
+def estado_fichero(ruta):
+    info = os.stat(ruta)
+    return {"tamano": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+def huella(ruta, bloque=1 << 20):
+    """sha256 del contenido de ruta, leído por bloques."""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(bloque), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+def guardar_modelo(ruta, compilado, origen=None):
+    """
+    origen: dict con tamano, mtime_ns y sha256 del fichero de datos y los
+    atributos y numericos con que se entrenó.
+    """
+    arrays = {nombre: np.ascontiguousarray(getattr(compilado, nombre)) for nombre in ARRAYS}
+    meta = {
+        "atributos": compilado.atributos,
+        "vocabulario": [vocab.tolist() for vocab in compilado.vocabulario],
+        "numericos": compilado.numericos,
+        "etiquetas": compilado.etiquetas,
+        "origen": origen,
+        "arrays": {},
+    }
+    #los desplazamientos dependen de la longitud de los metadatos: se
+    #calculan con un valor provisional y se repite si el JSON crece
+    inicio = 0
+    while True:
+        posicion = inicio
+        for nombre, array in arrays.items():
+            meta["arrays"][nombre] = [posicion, array.dtype.str, len(array)]
+            posicion += (array.nbytes + 7) // 8 * 8
+        texto = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        necesario = (HEADER.size + len(texto) + 7) // 8 * 8
+        if necesario <= inicio:
+            break
+        inicio = necesario
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(texto)))
+        f.write(texto)
+        for nombre, array in arrays.items():
+            f.write(b"\0" * (meta["arrays"][nombre][0] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(temporal, ruta)  #nunca queda un modelo a medio escribir
+
+def cargar_modelo(ruta):
+    """Retorna (ArbolCompilado con arrays mapeados en memoria, origen)."""
+    with open(ruta, "rb") as f:
+        cabecera = f.read(HEADER.size)
+        if len(cabecera) < HEADER.size:
+            raise ValueError(f"{ruta} es demasiado corto para ser un modelo")
+        magic, version, longitud = HEADER.unpack(cabecera)
+        if magic != MAGIC:
+            raise ValueError(f"{ruta} no es un modelo ID3")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Versión {version} de {ruta} no soportada")
+        meta = json.loads(f.read(longitud).decode("utf-8"))
+    contenido = np.memmap(ruta, dtype=np.uint8, mode="r")
+    arrays = {}
+    for nombre in ARRAYS:
+        posicion, dtype, n = meta["arrays"][nombre]
+        dtype = np.dtype(dtype)
+        if posicion + n * dtype.itemsize > len(contenido):
+            raise ValueError(f"{ruta} está truncado")
+        arrays[nombre] = contenido[posicion:posicion + n * dtype.itemsize].view(dtype)
+    compilado = ArbolCompilado.desde_arrays(meta["atributos"], meta["vocabulario"], meta["etiquetas"],
+                                            numericos=meta.get("numericos"), **arrays)
+    return compilado, meta["origen"]
+
+def ruta_modelo(datos):
+    #Juego.txt -> Juego.id3, junto al fichero de datos
+    return os.path.splitext(datos)[0] + ".id3"
+
+def configuracion(atributos, numericos=()):
+    #lo que además de los datos decide el árbol: columnas y atributos numéricos
+    return {"atributos": list(atributos), "numericos": sorted(numericos)}
+
+def modelo_guardado(datos, atributos, ruta=None, numericos=()):
+    """
+    El ArbolCompilado guardado en ruta (por defecto ruta_modelo(datos)) si
+    salió del contenido actual del fichero datos con los mismos atributos y
+    numericos; si no, None.
+    """
+    ruta = ruta or ruta_modelo(datos)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        compilado, origen = cargar_modelo(ruta)
+    except ValueError:
+        return None
+    if origen is None:
+        return None
+    config = configuracion(atributos, numericos)
+    if {clave: origen.get(clave) for clave in config} != config:
+        return None
+    estado = estado_fichero(datos)
+    if {clave: origen.get(clave) for clave in estado} == estado:
+        return compilado
+    sha = huella(datos)
+    if origen.get("sha256") != sha:
+        return None
+    #solo cambió la fecha: se reescribe desde una copia en memoria, porque
+    #en Windows no se puede reemplazar un fichero que sigue mapeado
+    compilado = ArbolCompilado.desde_arrays(compilado.atributos, compilado.vocabulario, compilado.etiquetas,
+                                            numericos=compilado.numericos,
+                                            **{nombre: np.array(getattr(compilado, nombre)) for nombre in ARRAYS})
+    guardar_modelo(ruta, compilado, dict(origen, **estado))
+    return compilado
+
+def modelo_para(datos, atributos, ruta=None, entrenar=None, numericos=()):
+    """
+    Como modelo_guardado, pero si no hay un modelo al día se entrena con
+    entrenar(datos, atributos) -> árbol (por defecto construir_arbol, con
+    numericos) y se guarda.
+    """
+    ruta = ruta or ruta_modelo(datos)
+    compilado = modelo_guardado(datos, atributos, ruta, numericos)
+    if compilado is not None:
+        return compilado
+    estado = estado_fichero(datos)
+    sha = huella(datos)
+    arbol = entrenar(datos, atributos) if entrenar is not None else _entrenar(datos, atributos, numericos)
+    compilado = ArbolCompilado(arbol)
+    guardar_modelo(ruta, compilado, dict(estado, sha256=sha, **configuracion(atributos, numericos)))
+    return compilado
+
+def _entrenar(datos, atributos, numericos):
+    #se importa aquí para que cargar un modelo no necesite el constructor
+    from dataset import Dataset
+    from tree import construir_arbol
+    return construir_arbol(Dataset.leer_csv(datos, atributos, numericos))
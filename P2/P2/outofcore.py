@@ -0,0 +1,206 @@
+# Entrenamiento ID3 sin cargar los datos en memoria
+#
+# Uso: python P2/P2/outofcore.py datos.csv [--atributos A.txt] [--modelo M.id3]
+# Construye el árbol por niveles, al estilo de RainForest. Una primera pasada
+# por el CSV lo codifica a enteros en un fichero temporal (el texto solo se
+# analiza una vez) y saca los valores de cada columna; después cada nivel es
+# una pasada por ese fichero. En ella cada fila baja por el árbol construido
+# hasta ahora y, si llega a un nodo abierto, suma 1 en la tabla (nodo,
+# atributo, valor, clase). Con esas cuentas se elige el atributo de cada nodo
+# abierto igual que construir_arbol, así que el árbol es el mismo. La memoria
+# depende de las tablas (nodos abiertos x valores x clases) y del tamaño de
+# lote, no del número de filas; si un nivel tiene demasiados nodos abiertos
+# se reparten en varias pasadas de como mucho max_tabla cuentas.
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from itertools import islice
+
+import numpy as np
+
+from dataset import meritos_tabla
+
+LOTE = 50_000
+MAX_TABLA = 1 << 23  #cuentas int64 por pasada (64 MiB)
+
+def _lotes(ruta, ancho, lote):
+    #arrays de texto (filas x columnas) de como mucho lote filas
+    with open(ruta, "r", encoding="utf-8", newline="") as f:
+        while True:
+            lineas = list(islice(f, lote))
+            if not lineas:
+                return
+            texto = "".join(lineas)
+            if '"' in texto:  #con comillas hace falta el lector de csv
+                filas = [fila for fila in csv.reader(lineas) if fila]
+                campos = [campo for fila in filas for campo in fila]
+            else:
+                filas = [linea for linea in texto.replace("\r", "").split("\n") if linea]
+                campos = ",".join(filas).split(",")
+            if len(campos) != len(filas) * ancho:
+                raise ValueError(f"Las filas de {ruta} deben tener {ancho} columnas")
+            yield np.array(campos, dtype=str).reshape(-1, ancho)
+
+def codificar_csv(ruta, atributos, destino, lote=LOTE):
+    """
+    Primera pasada: escribe en destino los códigos int32 de cada fila (en el
+    orden en que aparece cada valor). Retorna (valores ordenados de cada
+    columna, permutación de esos códigos a los del orden alfabético, filas).
+    """
+    vistos = [{} for _ in atributos]
+    filas = 0
+    with open(destino, "wb") as f:
+        for tabla in _lotes(ruta, len(atributos), lote):
+            codigos = np.empty(tabla.shape, dtype=np.int32)
+            for j, mapa in enumerate(vistos):
+                unicos, inversa = np.unique(tabla[:, j], return_inverse=True)
+                globales = np.array([mapa.setdefault(v, len(mapa)) for v in unicos.tolist()], dtype=np.int32)
+                codigos[:, j] = globales[inversa.ravel()]
+            f.write(codigos.tobytes())
+            filas += len(tabla)
+    valores = [sorted(mapa) for mapa in vistos]
+    permutacion = []
+    for mapa, ordenados in zip(vistos, valores):
+        orden = np.empty(len(mapa), dtype=np.int64)
+        orden[[mapa[v] for v in ordenados]] = np.arange(len(ordenados))
+        permutacion.append(orden)
+    return valores, permutacion, filas
+
+def construir_arbol_streaming(ruta, atributos, lote=LOTE, max_tabla=MAX_TABLA):
+    """
+    Mismo árbol que construir_arbol(Dataset.leer_csv(ruta, atributos)).
+    Retorna (árbol, pasadas por los datos). Los códigos van a un fichero
+    temporal en el directorio por defecto de tempfile.
+    """
+    descriptor, temporal = tempfile.mkstemp(suffix=".codigos")
+    os.close(descriptor)
+    try:
+        valores, permutacion, filas = codificar_csv(ruta, atributos, temporal, lote)
+        if filas == 0:
+            return None, 1
+        codigos = np.memmap(temporal, dtype=np.int32, mode="r", shape=(filas, len(atributos)))
+        try:
+            arbol, pasadas = _por_niveles(codigos, permutacion, valores, atributos, lote, max_tabla)
+        finally:
+            del codigos  #cerrar el mapa antes de borrar el fichero
+        return arbol, pasadas + 1
+    finally:
+        os.remove(temporal)
+
+def _por_niveles(codigos, permutacion, valores, atributos, lote, max_tabla):
+    k = len(valores[-1])
+    n_valores = np.array([len(v) for v in valores[:-1]])
+    inicio_valor = np.concatenate(([0], np.cumsum(n_valores)[:-1]))
+    total_valores = int(n_valores.sum())
+    #árbol construido hasta ahora, en arrays para poder bajar las filas:
+    #atributo del nodo (-1 si es hoja o está abierto) y sus hijos en destino
+    atributo, base, destino = [-1], [0], []
+    raiz = {}
+    abiertos = [(0, raiz, None, tuple(range(len(atributos) - 1)))]
+    pasadas = 0
+    por_pasada = max(1, max_tabla // (total_valores * k))
+    while abiertos:
+        siguientes = []
+        arrays = (np.array(atributo, dtype=np.int64), np.array(base, dtype=np.int64),
+                  np.array(destino, dtype=np.int64))
+        for g in range(0, len(abiertos), por_pasada):
+            grupo = abiertos[g:g + por_pasada]
+            tablas = _contar(codigos, permutacion, lote, arrays, [nodo for nodo, *_ in grupo],
+                             inicio_valor, total_valores, k)
+            pasadas += 1
+            for (nodo, padre, clave, candidatos), tabla in zip(grupo, tablas):
+                por_clase = tabla[:n_valores[0]].sum(axis=0)  #cada fila tiene un valor del atributo 0
+                presentes = np.flatnonzero(por_clase)
+                if len(presentes) == 1:
+                    padre[clave] = valores[-1][presentes[0]].upper()
+                    continue
+                if not candidatos:
+                    padre[clave] = None
+                    continue
+                #tabla y desplazamientos solo de los candidatos, en su orden
+                bloques = [tabla[inicio_valor[a]:inicio_valor[a] + n_valores[a]] for a in candidatos]
+                inicio = np.concatenate(([0], np.cumsum([len(b) for b in bloques])[:-1]))
+                merito = meritos_tabla(np.concatenate(bloques), inicio, int(por_clase.sum()))
+                mejor = candidatos[int(np.argmin(np.round(merito, 12)))]
+                conteo = tabla[inicio_valor[mejor]:inicio_valor[mejor] + n_valores[mejor]].sum(axis=1)
+                hijos = {}
+                padre[clave] = {atributos[mejor]: hijos}
+                restantes = tuple(a for a in candidatos if a != mejor)
+                atributo[nodo] = mejor
+                base[nodo] = len(destino)
+                for valor in range(n_valores[mejor]):
+                    if conteo[valor] == 0:
+                        destino.append(-1)
+                        continue
+                    destino.append(len(atributo))
+                    atributo.append(-1)
+                    base.append(0)
+                    hijos[valores[mejor][valor]] = None  #fija el orden de las ramas
+                    siguientes.append((len(atributo) - 1, hijos, valores[mejor][valor], restantes))
+        abiertos = siguientes
+    return raiz[None], pasadas
+
+def _contar(datos, permutacion, lote, arrays, nodos, inicio_valor, total_valores, k):
+    #una pasada: tabla (len(nodos), total_valores, k) de los nodos abiertos
+    atributo, base, destino = arrays
+    posicion = np.full(len(atributo), -1, dtype=np.int64)
+    posicion[nodos] = np.arange(len(nodos))
+    tamano = len(nodos) * total_valores * k
+    tablas = np.zeros(tamano, dtype=np.int64)
+    for inicio in range(0, len(datos), lote):
+        trozo = np.asarray(datos[inicio:inicio + lote])
+        codigos = np.empty((len(permutacion), len(trozo)), dtype=np.int64)
+        for j, orden in enumerate(permutacion):
+            codigos[j] = orden[trozo[:, j]]
+        #bajar todas las filas hasta una hoja o un nodo abierto
+        nodo = np.zeros(len(trozo), dtype=np.int64)
+        activos = np.flatnonzero(atributo[nodo] >= 0)
+        while len(activos):
+            actual = nodo[activos]
+            nodo[activos] = destino[base[actual] + codigos[atributo[actual], activos]]
+            activos = activos[atributo[nodo[activos]] >= 0]
+        g = posicion[nodo]
+        dentro = g >= 0
+        if not dentro.any():
+            continue
+        claves = (codigos[:-1, dentro] + inicio_valor[:, None]) * k + codigos[-1, dentro]
+        claves += g[dentro] * (total_valores * k)
+        #solo el tramo de la tabla que toca este trozo
+        claves = claves.ravel()
+        menor = int(claves.min())
+        cuentas = np.bincount(claves - menor)
+        tablas[menor:menor + len(cuentas)] += cuentas
+    return tablas.reshape(len(nodos), total_valores, k)
+
+def main(argv=None):
+    carpeta = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Entrena un árbol ID3 leyendo el CSV por niveles")
+    parser.add_argument("datos")
+    parser.add_argument("--atributos", default=os.path.join(carpeta, "AtributosJuego.txt"))
+    parser.add_argument("--modelo", help="fichero .id3 donde guardarlo (por defecto junto a los datos)")
+    parser.add_argument("--lote", type=int, default=LOTE)
+    args = parser.parse_args(argv)
+
+    from model import modelo_para  #guarda el modelo con la huella de los datos
+    with open(args.atributos, "r", encoding="utf-8") as f:
+        atributos = f.readline().strip().split(",")
+    pasadas = []
+
+    def entrenar(ruta, atributos):
+        arbol, n = construir_arbol_streaming(ruta, atributos, args.lote)
+        pasadas.append(n)
+        return arbol
+    t0 = time.perf_counter()
+    modelo_para(args.datos, atributos, args.modelo, entrenar)
+    if pasadas:
+        print(f"Entrenado en {time.perf_counter() - t0:.2f} s con {pasadas[0]} pasadas", file=sys.stderr)
+    else:
+        print("El modelo guardado ya está al día", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+# Dataset en memoria compartida
+#
+# Copia los códigos de un Dataset en un bloque de multiprocessing.shared_memory
+# para que los procesos de un pool lean los mismos ejemplos sin serializarlos
+# en cada tarea. Junto a ellos va el array de índices de ejemplos de
+# Dataset.orden_inicial (orden), que los procesos pueden reordenar, cada uno
+# en tramos distintos.
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from dataset import Dataset
+
+class SharedDataset:
+    """
+    Uso:
+        with SharedDataset(dataset) as shared:
+            pool = ProcessPoolExecutor(initializer=init_worker, initargs=(shared.handle,))
+    handle es una tupla serializable con los nombres de los bloques y los
+    textos de atributos y valores. shared.orden empieza siendo
+    dataset.orden_inicial().
+    """
+
+    def __init__(self, dataset):
+        codigos = dataset.codigos
+        self.codigos_shm = shared_memory.SharedMemory(create=True, size=max(1, codigos.nbytes))
+        inicial = dataset.orden_inicial()
+        self.orden_shm = shared_memory.SharedMemory(create=True, size=max(1, inicial.nbytes))
+        np.ndarray(codigos.shape, dtype=codigos.dtype, buffer=self.codigos_shm.buf)[:] = codigos
+        self.orden = np.ndarray(inicial.shape, dtype=np.int64, buffer=self.orden_shm.buf)
+        self.orden[:] = inicial
+        self.handle = (dataset.atributos, dataset.valores, dataset.numericos, codigos.shape, codigos.dtype.str,
+                       self.codigos_shm.name, self.orden_shm.name)
+
+    def close(self):
+        del self.orden  #la vista debe desaparecer antes de cerrar el bloque
+        for shm in (self.codigos_shm, self.orden_shm):
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def attach_dataset(handle):
+    """Devuelve (dataset, orden, bloques); hay que mantener vivos los bloques mientras se usen."""
+    atributos, valores, numericos, forma, dtype, codigos_name, orden_name = handle
+    blocks = [shared_memory.SharedMemory(name=codigos_name), shared_memory.SharedMemory(name=orden_name)]
+    codigos = np.ndarray(forma, dtype=dtype, buffer=blocks[0].buf)
+    codigos.flags.writeable = False
+    orden = np.ndarray((1 + len(numericos), forma[1]), dtype=np.int64, buffer=blocks[1].buf)
+    return Dataset(atributos, codigos, valores, numericos), orden, blocks
+
+# ----------------------- Estado de cada worker -----------------------
+
+_worker = {}
+
+def init_worker(handle):
+    #initializer del pool: cada proceso se engancha una vez al dataset
+    _worker["dataset"], _worker["orden"], _worker["blocks"] = attach_dataset(handle)
+
+def worker_dataset():
+    return _worker["dataset"], _worker["orden"]
@@ -0,0 +1,19 @@
+import numpy as np
+
+from bench import dataset_sintetico
+from ensemble import Bosque, construir_bosque
+
+def _columnas(dataset):
+    return {a: np.array(v, dtype=str)[c] for a, v, c in zip(dataset.atributos, dataset.valores, dataset.codigos)}
+
+def test_bosque_con_subespacio_no_deja_filas_sin_clase():
+    #con pocos atributos por árbol se acaban los candidatos antes de separar
+    #las clases: esas hojas deben votar la clase mayoritaria, no None
+    dataset = dataset_sintetico(20_000, 10)
+    arboles, _ = construir_bosque(dataset, 4, subespacio=3, processes=1)
+    resultados = Bosque(arboles).clasificar_lote(_columnas(dataset_sintetico(2_000, 10, seed=1)))
+    assert all(r is not None for r in resultados)
+
+def test_bosque_sin_etiquetas_no_falla():
+    resultados = Bosque([None, None]).clasificar_lote({"a0": ["v0", "v1"]})
+    assert list(resultados) == [None, None]
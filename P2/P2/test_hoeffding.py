@@ -0,0 +1,40 @@
+import random
+
+from hoeffding import ArbolHoeffding
+
+ATRIBUTOS = ["a0", "a1", "a2", "a3", "clase"]
+
+def _fila(rng, clase=None):
+    fila = [f"v{rng.randrange(4)}" for _ in ATRIBUTOS[:-1]]
+    return fila + [clase if clase is not None else rng.choice(["si", "no"])]
+
+def test_ruido_no_divide():
+    #la clase no depende de ningún atributo: ninguna hoja debe dividirse
+    rng = random.Random(0)
+    hoeffding = ArbolHoeffding(ATRIBUTOS)
+    hoeffding.aprender_filas(_fila(rng) for _ in range(30_000))
+    assert not isinstance(hoeffding.arbol(), dict)
+
+def test_hijos_con_ruido_no_dividen():
+    #tras dividir por a0 el resto es ruido; las cuentas heredadas del padre no
+    #deben hacer que la cota parezca más segura de lo que es
+    rng = random.Random(1)
+    hoeffding = ArbolHoeffding(ATRIBUTOS)
+    for _ in range(40_000):
+        fila = _fila(rng)
+        if rng.random() < 0.9:
+            fila[-1] = "si" if fila[0] in ("v0", "v1") else "no"
+        hoeffding.aprender(fila)
+    arbol = hoeffding.arbol()
+    assert list(arbol) == ["a0"]
+    assert all(not isinstance(hijo, dict) for hijo in arbol["a0"].values())
+
+def test_concepto_simple():
+    rng = random.Random(2)
+    hoeffding = ArbolHoeffding(ATRIBUTOS)
+    for _ in range(5_000):
+        fila = _fila(rng)
+        fila[-1] = "si" if fila[1] == "v0" else "no"
+        hoeffding.aprender(fila)
+    arbol = hoeffding.arbol()
+    assert list(arbol) == ["a1"] and arbol["a1"]["v0"] == "SI" and arbol["a1"]["v3"] == "NO"
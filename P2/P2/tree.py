@@ -0,0 +1,171 @@
+# Algoritmo ID3 sin interfaz
+#
+# Construye el árbol como diccionarios anidados {atributo: {valor: subárbol}}
+# con hojas 'SI'/'NO' (la clase en mayúsculas), o None si no se puede decidir.
+# Trabaja sobre un Dataset codificado. Todos los nodos comparten un único
+# array de índices de ejemplos: cada nodo es un tramo [inicio, fin) de ese
+# array, y al dividir un nodo su tramo se reordena en el sitio agrupando los
+# ejemplos por valor. Los nodos pendientes van en una pila explícita, así que
+# la profundidad no está limitada por la recursión de Python.
+# Los atributos numéricos se dividen en dos ramas, '<=umbral' y '>umbral', y
+# siguen siendo candidatos en los hijos. Para cada uno hay otra fila del array
+# de índices con el mismo tramo ordenado por su valor (Dataset.orden_inicial):
+# al dividir un nodo se reparte de forma estable entre los hijos, así que
+# sigue ordenada y el mejor umbral sale de un recorrido O(n) (mejor_umbral).
+# construir_arbol_paralelo reparte los subárboles grandes entre procesos que
+# comparten el dataset y el array de índices (cada uno en su tramo).
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dataset import MAYOR, MENOR, meritos, mejor_umbral, umbral_de
+from shared import SharedDataset, init_worker, worker_dataset
+
+# tamaño mínimo (en ejemplos) de un subárbol para mandarlo a otro proceso
+UMBRAL_PARALELO = 50_000
+
+def construir_arbol(dataset, candidatos=None, filas=None, mayoritaria=False):
+    """
+    candidatos: índices de columna que se pueden usar (por defecto todos
+    menos la clase); filas: índices de los ejemplos (por defecto todos).
+    mayoritaria: si se acaban los atributos sin separar las clases, la hoja
+    es la clase más frecuente en vez de None (para los árboles de un bosque).
+    """
+    if candidatos is None:
+        candidatos = range(len(dataset.atributos) - 1)
+    orden = dataset.orden_inicial(filas)
+    raiz = {}
+    _expandir(dataset, orden, [(raiz, None, 0, orden.shape[1], tuple(candidatos))], mayoritaria=mayoritaria)
+    return raiz[None]
+
+def _expandir(dataset, orden, pila, repartir=None, mayoritaria=False):
+    """
+    Construye los nodos de pila, tuplas (diccionario padre, clave en el
+    padre, inicio, fin, candidatos); orden es el de Dataset.orden_inicial.
+    repartir(inicio, fin, candidatos) puede devolver un futuro con el
+    subárbol de un hijo en vez de construirlo aquí; se retornan los
+    (padre, clave, futuro) pendientes.
+    """
+    pendientes = []
+    fila_orden = {a: 1 + i for i, a in enumerate(dataset.numericos)}
+    #rama de cada ejemplo al dividir, para repartir las filas ordenadas
+    rama = np.empty(dataset.n, dtype=np.int32) if fila_orden else None
+    while pila:
+        padre, clave, inicio, fin, candidatos = pila.pop()
+        if inicio == fin:
+            padre[clave] = None
+            continue
+        filas = orden[0, inicio:fin]  #vista, no copia
+        clase = dataset.clase[filas]
+        if (clase == clase[0]).all():
+            padre[clave] = dataset.etiqueta(clase[0])
+            continue
+        #sin atributos que separen: None, o la clase más frecuente (empate: la primera)
+        sin_division = dataset.etiqueta(np.bincount(clase).argmax()) if mayoritaria else None
+        if not candidatos:
+            padre[clave] = sin_division
+            continue
+        # Seleccionar el mejor atributo: el que minimiza la entropía condicional
+        # (redondeada, para que en un empate gane siempre el primer candidato)
+        merito, umbrales = _meritos_nodo(dataset, orden, inicio, fin, candidatos, fila_orden)
+        if np.isinf(merito).all():  #solo numéricos y todos con un único valor
+            padre[clave] = sin_division
+            continue
+        i = int(np.argmin(np.round(merito, 12)))
+        mejor = candidatos[i]
+        columna = dataset.codigos[mejor, filas]
+        hijos = {}
+        padre[clave] = {dataset.atributos[mejor]: hijos}
+        if mejor in fila_orden:
+            columna = (columna > umbrales[i]).astype(np.int32)  #0: <=, 1: >
+            texto = dataset.valores[mejor][umbrales[i]]
+            textos = (MENOR + texto, MAYOR + texto)
+            restantes = candidatos
+        else:
+            textos = dataset.valores[mejor]
+            restantes = tuple(a for a in candidatos if a != mejor)
+        #con códigos de 16 bits el argsort estable es una ordenación radix, O(n)
+        tipo = np.uint16 if len(textos) <= 1 << 16 else np.int32
+        if rama is not None:
+            rama[filas] = columna
+        orden[0, inicio:fin] = filas[np.argsort(columna.astype(tipo), kind="stable")]
+        for fila in fila_orden.values():
+            tramo = orden[fila, inicio:fin]
+            orden[fila, inicio:fin] = tramo[np.argsort(rama[tramo].astype(tipo), kind="stable")]
+        conteo = np.bincount(columna, minlength=len(textos))
+        cortes = inicio + np.concatenate(([0], np.cumsum(conteo)))
+        for valor in np.flatnonzero(conteo):
+            texto = textos[valor]
+            hijos[texto] = None  #fija el orden de las ramas
+            tramo = (int(cortes[valor]), int(cortes[valor + 1]), restantes)
+            futuro = repartir(*tramo) if repartir is not None else None
+            if futuro is None:
+                pila.append((hijos, texto) + tramo)
+            else:
+                pendientes.append((hijos, texto, futuro))
+    return pendientes
+
+def _meritos_nodo(dataset, orden, inicio, fin, candidatos, fila_orden):
+    #mérito de cada candidato en el nodo y, para los numéricos, su mejor umbral
+    categoricos = [i for i, a in enumerate(candidatos) if a not in fila_orden]
+    if len(categoricos) == len(candidatos):
+        return meritos(dataset, orden[0, inicio:fin], candidatos), None
+    merito = np.empty(len(candidatos))
+    umbrales = [None] * len(candidatos)
+    if categoricos:
+        merito[categoricos] = meritos(dataset, orden[0, inicio:fin], [candidatos[i] for i in categoricos])
+    for i, a in enumerate(candidatos):
+        if a in fila_orden:
+            merito[i], umbrales[i] = mejor_umbral(dataset, orden[fila_orden[a], inicio:fin], a)
+    return merito, umbrales
+
+def construir_arbol_paralelo(dataset, candidatos=None, processes=None, umbral=UMBRAL_PARALELO):
+    """
+    Mismo árbol que construir_arbol. Los hijos con al menos umbral ejemplos
+    se construyen en un pool de processes procesos; los pequeños, aquí.
+    processes=1 no crea pool.
+    """
+    if candidatos is None:
+        candidatos = range(len(dataset.atributos) - 1)
+    if processes == 1 or dataset.n < umbral:
+        return construir_arbol(dataset, candidatos)
+    with SharedDataset(dataset) as shared, \
+            ProcessPoolExecutor(processes, initializer=init_worker, initargs=(shared.handle,)) as pool:
+
+        def repartir(inicio, fin, restantes):
+            if fin - inicio < umbral:
+                return None
+            return pool.submit(_worker_subarbol, inicio, fin, restantes)
+
+        raiz = {}
+        pendientes = _expandir(dataset, shared.orden, [(raiz, None, 0, dataset.n, tuple(candidatos))], repartir)
+        for padre, clave, futuro in pendientes:
+            padre[clave] = futuro.result()
+    return raiz[None]
+
+def _worker_subarbol(inicio, fin, candidatos):
+    dataset, orden = worker_dataset()
+    raiz = {}
+    _expandir(dataset, orden, [(raiz, None, inicio, fin, candidatos)])
+    return raiz[None]
+
+# Función para clasificar un ejemplo usando el árbol
+def clasificar(arbol, ejemplo):
+    if not isinstance(arbol, dict):
+        return arbol
+    atributo = next(iter(arbol))
+    if atributo not in ejemplo:
+        return f"⚠️ Falta el atributo '{atributo}'"
+    valor = ejemplo[atributo]
+    ramas = arbol[atributo]
+    if valor in ramas:
+        return clasificar(ramas[valor], ejemplo)
+    umbral = umbral_de(ramas)
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        umbral = None
+    if umbral is None:
+        return f"⚠️ Valor '{valor}' no válido para '{atributo}'"
+    return clasificar(ramas[(MENOR if numero <= float(umbral) else MAYOR) + umbral], ejemplo)